@@ -23,3 +23,7 @@ text_list = ["col1", "col2", "col3"]
 widths = [5, 20, 15]
 align = ["left", "center", "right"]
 p.software_columns(text_list=text_list, widths=widths, align=align)
+
+# A whole table at once:
+rows = [["Item", "Qty", "Price"], ["Coffee beans", "2", "9.80"], ["Tea", "1", "3.50"]]
+p.table(rows, widths=[12, 5], align=["left", "right"])
@@ -1,10 +1,12 @@
 #!/usr/bin/env python
 """Setup script for python package."""
 
+import importlib.util
 import os
 import sys
 
 from setuptools import find_packages, setup
+from setuptools.command.build_py import build_py
 
 base_dir = os.path.dirname(__file__)
 src_dir = os.path.join(base_dir, "src")
@@ -32,7 +34,26 @@ version = '{version}'
 """
 
 
+class BuildPyWithCodePageTables(build_py):
+    """Build the package and precompute the code page tables."""
+
+    def run(self):
+        """Build the package, then write the tables for the shipped capabilities.json."""
+        super().run()
+        # load the module without importing the package, which needs its dependencies
+        spec = importlib.util.spec_from_file_location(
+            "codepage_tables", os.path.join(src_dir, "escpos", "codepage_tables.py")
+        )
+        codepage_tables = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(codepage_tables)
+        codepage_tables.write_tables(
+            os.path.join(src_dir, "escpos", "capabilities.json"),
+            os.path.join(self.build_lib, "escpos", codepage_tables.TABLES_FILENAME),
+        )
+
+
 setup(
+    cmdclass={"build_py": BuildPyWithCodePageTables},
     use_scm_version={
         "write_to": "src/escpos/version.py",
         "write_to_template": setuptools_scm_template,
@@ -0,0 +1,82 @@
+"""Raster writer for the barcode library.
+
+This module contains :py:class:`RasterWriter`, a writer for the `barcode` library
+that turns the modules of a barcode straight into packed 1-bpp raster data at the
+resolution of the printer, without drawing an image or loading fonts.
+The human-readable text is not rendered; it is printed as native printer text instead.
+
+:author: python-escpos developers
+:organization: `python-escpos <https://github.com/python-escpos>`_
+:copyright: Copyright (c) 2026 python-escpos
+:license: MIT
+"""
+
+from typing import List, Tuple
+
+from barcode.writer import BaseWriter
+
+from escpos.image import EscposImage
+
+
+class RasterWriter(BaseWriter):
+    """Writer that renders barcodes to an :py:class:`~escpos.image.EscposImage`.
+
+    All sizes are given in mm, like for the other writers of the `barcode` library,
+    and are converted to dots with the option `dpi`.
+    Every module of the barcode is rounded to the same width in dots,
+    so that the ratio of bars and spaces is kept on low resolution printers.
+    """
+
+    def __init__(self) -> None:
+        """Initialize writer."""
+        super().__init__(self._init, self._paint_module, None, self._finish)
+        self.dpi = 180
+        self._base_height = 0.0
+        self._modules = 0
+        self._bars: List[Tuple[int, int, bool]] = []
+
+    def _dots(self, mm: float) -> int:
+        """Convert a length in mm into dots."""
+        return int(round(mm * self.dpi / 25.4))
+
+    def _init(self, code: List[str]) -> None:
+        """Reset the state for a new barcode."""
+        self._base_height = self.module_height
+        self._modules = len(code[0])
+        self._bars = []
+
+    def _paint_module(self, xpos: float, ypos: float, width: float, color) -> None:
+        """Collect a bar, spaces are not painted."""
+        if color != self.foreground:
+            return
+        start = int(round((xpos - self.quiet_zone) / self.module_width))
+        modules = int(round(width / self.module_width))
+        self._bars.append(
+            (start, start + modules, self.module_height != self._base_height)
+        )
+
+    def _finish(self) -> EscposImage:
+        """Pack the collected bars into raster data."""
+        module_dots = max(1, self._dots(self.module_width))
+        quiet_dots = self._dots(self.quiet_zone)
+        width = 2 * quiet_dots + self._modules * module_dots
+        row_bytes = (width + 7) >> 3
+        padded_width = row_bytes * 8
+
+        row = guard_row = 0
+        for start, end, guard in self._bars:
+            bar = ((1 << ((end - start) * module_dots)) - 1) << (
+                padded_width - quiet_dots - end * module_dots
+            )
+            row |= bar
+            if guard:
+                guard_row |= bar
+
+        height = max(1, self._dots(self._base_height))
+        guard_height = self._dots(self._base_height * self.guard_height_factor)
+        guard_height = max(guard_height - height, 0) if guard_row else 0
+        raster = (
+            row.to_bytes(row_bytes, "big") * height
+            + guard_row.to_bytes(row_bytes, "big") * guard_height
+        )
+        return EscposImage(raster, width, height + guard_height)
@@ -0,0 +1,128 @@
+"""Batch rendering of images, QR codes and barcodes.
+
+Converting images, QR codes and software barcodes into ESC/POS commands is CPU
+bound and single threaded. This module renders a list of such items in a pool
+of worker processes and returns the command bytes in the order of the input,
+so that they can be sent to the printer one after another.
+
+Each item is described as a tuple of the name of the :py:class:`~escpos.escpos.Escpos`
+method and a dict with the keyword arguments for this method:
+
+.. code-block:: Python
+
+    from escpos.batch import render_batch
+    from escpos.printer import Network
+
+    specs = [
+        ("qr", {"content": "https://example.com/1", "size": 4}),
+        ("barcode", {"code": "4006381333931", "bc": "EAN13", "force_software": True}),
+        ("image", {"img_source": "logo.png", "center": True}),
+    ]
+    p = Network("192.168.1.99", profile="TM-T88V")
+    for data in render_batch(specs, profile="TM-T88V"):
+        p.raw_bytes(data)
+
+:author: python-escpos developers
+:organization: `python-escpos <https://github.com/python-escpos>`_
+:copyright: Copyright (c) 2026 python-escpos
+:license: MIT
+"""
+
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+#: methods of :py:class:`~escpos.escpos.Escpos` that can be rendered in a batch
+BATCH_METHODS = ("image", "qr", "barcode")
+
+RenderSpec = Tuple[str, Dict[str, Any]]
+
+
+def _check_method(method: str) -> None:
+    """Raise a ValueError if `method` can not be rendered in a batch."""
+    if method not in BATCH_METHODS:
+        raise ValueError(
+            f"Method {method} can not be rendered in a batch. "
+            f"Valid methods are: {', '.join(BATCH_METHODS)}"
+        )
+
+
+def render(spec: RenderSpec, profile: Optional[str] = None) -> bytes:
+    """Render a single item into ESC/POS command bytes.
+
+    The item is rendered with a :py:class:`~escpos.printer.Dummy` printer
+    using the given profile.
+
+    :param spec: tuple of method name and keyword arguments, see :py:data:`BATCH_METHODS`
+    :param profile: name of the printer profile to render for
+    :raises: :py:exc:`ValueError` if the method can not be rendered in a batch
+    """
+    from .printer.dummy import Dummy
+
+    method, kwargs = spec
+    _check_method(method)
+    dummy = Dummy(profile=profile)
+    # QR codes are framed by newlines. Those are ASCII and thus the same in
+    # every code page, so claim the code page the writing printer would pick
+    # for them. This keeps code page changes out of the rendered bytes, which
+    # would otherwise get the state of the writing printer out of sync.
+    dummy.magic.reset(dummy.magic.encoder.find_suitable_encoding("\n"))
+    getattr(dummy, method)(**kwargs)
+    return dummy.output
+
+
+def _render_star(args: Tuple[RenderSpec, Optional[str]]) -> bytes:
+    """Unpack the arguments for :py:func:`render` in a worker process."""
+    return render(*args)
+
+
+def render_batch(
+    specs: Iterable[RenderSpec],
+    profile: Optional[str] = None,
+    max_workers: Optional[int] = None,
+    chunksize: int = 1,
+    executor: Optional[Executor] = None,
+) -> List[bytes]:
+    """Render a batch of images, QR codes and barcodes in parallel.
+
+    The items are rendered in a :py:class:`concurrent.futures.ProcessPoolExecutor`,
+    so that the conversion scales with the number of CPU cores.
+    The arguments of the items and the profile are sent to the worker processes,
+    hence they have to be picklable: pass file names or PIL images as image sources
+    and the profile by its name.
+
+    :param specs: items to render, each a tuple of method name and keyword arguments
+    :param profile: name of the printer profile to render for, *default*: the default profile
+    :param max_workers: number of worker processes, *default*: number of CPUs
+    :param chunksize: number of items that are sent to a worker process at once.
+        Larger values reduce the overhead for large batches of small items.
+    :param executor: process pool to render in, *default*: a new
+        :py:class:`concurrent.futures.ProcessPoolExecutor` that is shut down afterwards.
+        Pass a pool to reuse its worker processes for several batches,
+        `max_workers` is ignored then.
+    :return: list with the command bytes of each item, in the order of `specs`
+    """
+    specs = list(specs)
+    for method, _ in specs:
+        _check_method(method)
+    if not specs:
+        return []
+    if executor is None:
+        with ProcessPoolExecutor(max_workers=max_workers) as own_executor:
+            return _map(own_executor, specs, profile, chunksize)
+    return _map(executor, specs, profile, chunksize)
+
+
+def _map(
+    executor: Executor,
+    specs: List[RenderSpec],
+    profile: Optional[str],
+    chunksize: int,
+) -> List[bytes]:
+    """Render the items in the executor, in the order of `specs`."""
+    return list(
+        executor.map(
+            _render_star,
+            [(spec, profile) for spec in specs],
+            chunksize=chunksize,
+        )
+    )
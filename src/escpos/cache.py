@@ -0,0 +1,142 @@
+"""Caches for rendered output.
+
+This module contains a least recently used cache with limits on the number of
+entries and on the total size of the cached values.
+It is used to keep rendered output that is printed repeatedly, such as QR codes
+and barcodes, see :py:meth:`escpos.escpos.Escpos.set_render_cache`.
+
+:author: python-escpos developers
+:organization: `python-escpos <https://github.com/python-escpos>`_
+:copyright: Copyright (c) 2026 python-escpos
+:license: MIT
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, NamedTuple, Optional
+
+
+class CacheStatistics(NamedTuple):
+    """Statistics of a :py:class:`LRUCache`."""
+
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    size: int
+
+    @property
+    def hit_rate(self) -> float:
+        """Return the share of lookups that were answered from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+def _len_of_chunks(value: Any) -> int:
+    """Return the total length of a sequence of byte strings."""
+    return sum(len(chunk) for chunk in value)
+
+
+class LRUCache:
+    """Least recently used cache.
+
+    The least recently used entries are evicted once the cache holds more than
+    `max_entries` entries or the total size of the values exceeds `max_size`.
+    Values that are larger than `max_size` on their own are not cached at all.
+
+    The cache is safe to be shared between threads and printer instances.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        max_size: Optional[int] = 4 * 1024 * 1024,
+        sizeof: Callable[[Any], int] = _len_of_chunks,
+    ) -> None:
+        """Initialize cache.
+
+        :param max_entries: maximum number of entries
+        :param max_size: maximum total size of the cached values, None for no limit
+        :param sizeof: function that returns the size of a value,
+            *default*: total length of a sequence of byte strings
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self._sizeof = sizeof
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._sizes: Dict[Hashable, int] = {}
+        self._lock = threading.Lock()
+        self._size = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def __len__(self) -> int:
+        """Return the number of entries."""
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        """Check whether `key` is cached, without counting it as lookup."""
+        return key in self._entries
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the value cached for `key` or None.
+
+        :param key: key of the entry
+        """
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Cache `value` for `key`.
+
+        :param key: key of the entry
+        :param value: value to cache
+        """
+        size = self._sizeof(value)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if self.max_size is not None and size > self.max_size:
+                return
+            self._entries[key] = value
+            self._sizes[key] = size
+            self._size += size
+            while len(self._entries) > self.max_entries or (
+                self.max_size is not None and self._size > self.max_size
+            ):
+                self._remove(next(iter(self._entries)))
+                self._evictions += 1
+
+    def _remove(self, key: Hashable) -> None:
+        """Remove an entry, the lock has to be held."""
+        del self._entries[key]
+        self._size -= self._sizes.pop(key)
+
+    def clear(self) -> None:
+        """Remove all entries and reset the statistics."""
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._size = 0
+            self._hits = self._misses = self._evictions = 0
+
+    @property
+    def statistics(self) -> CacheStatistics:
+        """Return the statistics of this cache."""
+        return CacheStatistics(
+            hits=self._hits,
+            misses=self._misses,
+            evictions=self._evictions,
+            entries=len(self._entries),
+            size=self._size,
+        )
@@ -1,24 +1,46 @@
-"""Handler for capabilities data."""
+"""Handler for capabilities data.
+
+The printer database is loaded when a profile is used for the first time, not on import.
+It is parsed with the JSON parser of the standard library, YAML is only used as fallback.
+The parsed database is cached in the user cache directory, so that other processes
+can load it from there. The cache file is indexed by the names of the profiles and
+encodings and mapped into memory, a record is only read once it is used.
+"""
 import atexit
+import json
 import logging
+import mmap
+import os
 import pickle
 import platform
 import re
+import struct
+import tempfile
+import threading
 import time
 from contextlib import ExitStack
 from os import environ, path
-from tempfile import mkdtemp
-from typing import Any, Dict, Optional, Type
+from types import MappingProxyType
+from typing import Any, Dict, FrozenSet, Iterator, Mapping, Optional, Tuple, Type
 
 import importlib_resources
-import yaml
+import platformdirs
+
+from .cache import LRUCache
 
 if environ.get("ESCPOS_CAPABILITIES_DEBUG", 0):
     logging.basicConfig()
 
 logger = logging.getLogger(__name__)
-pickle_dir = environ.get("ESCPOS_CAPABILITIES_PICKLE_DIR", mkdtemp())
-pickle_path = path.join(pickle_dir, f"{platform.python_version()}.capabilities.pickle")
+pickle_dir = environ.get(
+    "ESCPOS_CAPABILITIES_PICKLE_DIR", platformdirs.user_cache_dir("python-escpos")
+)
+pickle_path = path.join(pickle_dir, f"{platform.python_version()}.capabilities.index")
+
+#: magic number of the index file, position and length of its header
+INDEX_MAGIC = b"ESCPOSDB"
+INDEX_HEADER = struct.Struct("<8sQQ")
+
 # get a temporary file from importlib_resources if no file is specified in env
 file_manager = ExitStack()
 atexit.register(file_manager.close)
@@ -28,36 +50,166 @@ capabilities_path = environ.get(
     file_manager.enter_context(importlib_resources.as_file(ref)),
 )
 
-# Load external printer database
-t0 = time.time()
-logger.debug("Using capabilities from file: %s", capabilities_path)
-if path.exists(pickle_path):
-    if path.getmtime(capabilities_path) > path.getmtime(pickle_path):
-        logger.debug("Found a more recent capabilities file")
-        full_load = True
-    else:
-        full_load = False
-        logger.debug("Loading capabilities from pickle in %s", pickle_path)
+# the printer database, see get_capabilities()
+_capabilities: Optional[Dict[str, Any]] = None
+_capabilities_lock = threading.Lock()
+
+
+def _capabilities_stamp() -> Tuple[str, int, int]:
+    """Identify the version of the capabilities file by its path, mtime and size."""
+    stat = os.stat(capabilities_path)
+    return path.abspath(capabilities_path), stat.st_mtime_ns, stat.st_size
+
+
+class LazyRecords(Mapping):
+    """Profiles or encodings of the database, read from the index file on access.
+
+    Only the names and the positions of the records are kept in memory,
+    a record is unpickled from the memory mapped file when it is used for the first time.
+    """
+
+    def __init__(self, buffer: mmap.mmap, index: Dict[str, Tuple[int, int]]) -> None:
+        """Initialize records.
+
+        :param buffer: the memory mapped index file
+        :param index: offset and length of each record in the file by name
+        """
+        self._buffer = buffer
+        self._index = index
+        self._records: Dict[str, Any] = {}
+
+    def __getitem__(self, name: str) -> Any:
+        """Return a record, read it on first access."""
+        try:
+            return self._records[name]
+        except KeyError:
+            pass
+        offset, length = self._index[name]
+        record = pickle.loads(self._buffer[offset : offset + length])
+        self._records[name] = record
+        return record
+
+    def __contains__(self, name: object) -> bool:
+        """Check whether there is a record, without reading it."""
+        return name in self._index
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the names of the records."""
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        """Return the number of records."""
+        return len(self._index)
+
+
+def _load_index(stamp: Tuple[str, int, int]) -> Optional[Dict[str, Any]]:
+    """Load the index file, if it is from the current capabilities file.
+
+    The file starts with :py:data:`INDEX_MAGIC` and the position of the pickled
+    header at the end of the file, followed by the pickled records. The header holds
+    the stamp of the capabilities file, the positions of the records and the other
+    entries of the database.
+    """
+    try:
         with open(pickle_path, "rb") as cf:
-            CAPABILITIES = pickle.load(cf)
-else:
-    logger.debug("Capabilities pickle file not found: %s", pickle_path)
-    full_load = True
-
-if full_load:
-    logger.debug("Loading and pickling capabilities")
-    with open(capabilities_path) as cp, open(pickle_path, "wb") as pp:
-        CAPABILITIES = yaml.safe_load(cp)
-        if not CAPABILITIES:
+            buffer = mmap.mmap(cf.fileno(), 0, access=mmap.ACCESS_READ)
+    except FileNotFoundError:
+        logger.debug("Capabilities index file not found: %s", pickle_path)
+        return None
+    except (OSError, ValueError):
+        logger.debug("Capabilities index file could not be read: %s", pickle_path)
+        return None
+    try:
+        magic, header_offset, header_length = INDEX_HEADER.unpack_from(buffer)
+        if magic != INDEX_MAGIC:
+            raise ValueError("Unknown file format")
+        cached_stamp, indexes, entries = pickle.loads(
+            buffer[header_offset : header_offset + header_length]
+        )
+    except (struct.error, pickle.UnpicklingError, EOFError, ValueError, TypeError):
+        logger.debug("Capabilities index file could not be read: %s", pickle_path)
+        buffer.close()
+        return None
+    if cached_stamp != stamp:
+        logger.debug("Found a more recent capabilities file")
+        buffer.close()
+        return None
+    logger.debug("Loading capabilities from index in %s", pickle_path)
+    for key, index in indexes.items():
+        entries[key] = LazyRecords(buffer, index)
+    return entries
+
+
+def _store_index(stamp: Tuple[str, int, int], capabilities: Dict[str, Any]) -> None:
+    """Write the index file of the capabilities, see :py:func:`_load_index`.
+
+    The file is written under a temporary name and then renamed, so that other
+    processes never read a partially written file.
+    """
+    records = []
+    offset = INDEX_HEADER.size
+    indexes: Dict[str, Dict[str, Tuple[int, int]]] = {}
+    entries = {}
+    for key, value in capabilities.items():
+        if key not in ("profiles", "encodings"):
+            entries[key] = value
+            continue
+        indexes[key] = {}
+        for name, record in value.items():
+            data = pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL)
+            indexes[key][name] = (offset, len(data))
+            records.append(data)
+            offset += len(data)
+    header = pickle.dumps((stamp, indexes, entries), protocol=pickle.HIGHEST_PROTOCOL)
+
+    try:
+        os.makedirs(pickle_dir, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=pickle_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as pp:
+                pp.write(INDEX_HEADER.pack(INDEX_MAGIC, offset, len(header)))
+                pp.writelines(records)
+                pp.write(header)
+            os.replace(temp_path, pickle_path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+    except OSError as e:
+        logger.debug("Capabilities could not be cached in %s: %s", pickle_path, e)
+
+
+def _parse_capabilities() -> Any:
+    """Parse the capabilities file, with the JSON parser if possible."""
+    with open(capabilities_path, encoding="utf-8") as cp:
+        content = cp.read()
+    try:
+        return json.loads(content)
+    except ValueError:
+        logger.debug("Capabilities are no valid JSON, loading them as YAML")
+    import yaml
+
+    return yaml.safe_load(content)
+
+
+def _load_capabilities() -> Dict[str, Any]:
+    """Load the capabilities from the index file or the capabilities file."""
+    t0 = time.time()
+    logger.debug("Using capabilities from file: %s", capabilities_path)
+    stamp = _capabilities_stamp()
+    capabilities = _load_index(stamp)
+    if capabilities is None:
+        logger.debug("Loading and indexing capabilities")
+        capabilities = _parse_capabilities()
+        if not capabilities:
             # yaml could not be loaded
             print(
                 f"Capabilities yaml from {capabilities_path} could not be loaded.\n"
                 "This python package seems to be broken. If it has been installed "
                 "from official sources, please report an issue on GitHub.\n"
                 "Currently loaded capabilities:\n"
-                f"{CAPABILITIES}"
+                f"{capabilities}"
             )
-            CAPABILITIES = {
+            capabilities = {
                 "profiles": {
                     "default": {
                         "name": "BrokenDefault",
@@ -76,11 +228,29 @@ if full_load:
             print(
                 "Created a minimal backup profile, "
                 "many functionalities of the library will not work:\n"
-                f"{CAPABILITIES}"
+                f"{capabilities}"
             )
-        pickle.dump(CAPABILITIES, pp, protocol=2)
+        _store_index(stamp, capabilities)
+
+    logger.debug("Finished loading capabilities took %.2fs", time.time() - t0)
+    return capabilities
 
-logger.debug("Finished loading capabilities took %.2fs", time.time() - t0)
+
+def get_capabilities() -> Dict[str, Any]:
+    """Return the printer database, it is loaded on first use."""
+    global _capabilities
+    if _capabilities is None:
+        with _capabilities_lock:
+            if _capabilities is None:
+                _capabilities = _load_capabilities()
+    return _capabilities
+
+
+def __getattr__(name: str) -> Any:
+    """Load the printer database when ``CAPABILITIES`` is accessed."""
+    if name == "CAPABILITIES":
+        return get_capabilities()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 class NotSupported(Exception):
@@ -91,6 +261,122 @@ class NotSupported(Exception):
 
 BARCODE_B = "barcodeB"
 
+#: features for barcodes rendered by the printer, in order of preference
+BARCODE_HW_MODES = ("barcodeA", BARCODE_B)
+#: features for barcodes rendered as image, in order of preference
+BARCODE_SW_MODES = ("graphics", "bitImageColumn", "bitImageRaster")
+
+#: DPI that is assumed if the profile has no information about it
+DEFAULT_DPI = 180
+
+
+def _media_dpi(media: Dict[str, Any]) -> int:
+    """Get the DPI of the printer from the media data of a profile."""
+    try:
+        return int(media["dpi"])
+    except (KeyError, TypeError, ValueError):
+        pass
+    # Calculate the printer's DPI from the width info of the profile.
+    try:
+        px = media["width"]["pixels"]
+        mm = media["width"]["mm"]
+        mm -= 10  # paper width minus margin =~ printable area
+        return int(px / (mm / 25.4))
+    except (KeyError, TypeError, ZeroDivisionError):
+        logger.info("No printer's DPI info was found: Defaulting to %d.", DEFAULT_DPI)
+        return DEFAULT_DPI
+
+
+class ProfileInfo:
+    """Data of a profile that is used while printing, computed once.
+
+    The supported features, the code pages, the DPI, the columns of the fonts and the
+    supported barcode modes are derived from the profile data when a profile is used
+    for the first time, so that checking them while printing is a single lookup.
+    The data is shared between all profile objects with the same data,
+    see :py:meth:`BaseProfile.info`.
+    """
+
+    __slots__ = (
+        "stale",
+        "profile_data",
+        "features_data",
+        "features",
+        "code_pages",
+        "columns",
+        "media_width",
+        "dpi",
+        "barcode_hw_modes",
+        "barcode_sw_modes",
+    )
+
+    def __init__(self, profile_data: Dict[str, Any], features: Dict[str, Any]) -> None:
+        """Compute the data.
+
+        :param profile_data: data of the profile
+        :param features: features of the profile, may differ from the profile data
+            for custom profiles
+        """
+        #: set by :py:meth:`BaseProfile.refresh` when the data has been changed in place
+        self.stale = False
+        # the data is kept to recognize when a profile object changes it
+        self.profile_data = profile_data
+        self.features_data = features
+        #: names of the supported features
+        self.features: FrozenSet[str] = frozenset(
+            feature for feature, supported in features.items() if supported
+        )
+        #: code pages as ``{name: slot}``, the slots are strings like in the profile
+        self.code_pages: Mapping[str, str] = MappingProxyType(
+            {name: index for index, name in profile_data.get("codePages", {}).items()}
+        )
+        #: columns by font index
+        self.columns: Mapping[str, int] = MappingProxyType(
+            {
+                index: font.get("columns")
+                for index, font in profile_data.get("fonts", {}).items()
+            }
+        )
+        media = profile_data.get("media", {})
+        try:
+            media_width: Optional[int] = int(media["width"]["pixels"])
+        except (KeyError, TypeError, ValueError):
+            media_width = None
+        #: printable width in pixels, None if unknown
+        self.media_width = media_width
+        self.dpi = _media_dpi(media)
+        #: supported barcode modes, in order of preference
+        self.barcode_hw_modes = tuple(
+            mode for mode in BARCODE_HW_MODES if mode in self.features
+        )
+        self.barcode_sw_modes = tuple(
+            mode for mode in BARCODE_SW_MODES if mode in self.features
+        )
+
+
+# features of profile data without features
+_NO_FEATURES: Dict[str, Any] = {}
+
+# precomputed data of the profiles, by the ids of profile data and features
+_PROFILE_INFOS = LRUCache(max_entries=64, max_size=None, sizeof=lambda info: 0)
+
+
+def _get_profile_info(
+    profile_data: Dict[str, Any], features: Dict[str, Any]
+) -> ProfileInfo:
+    """Get the shared precomputed data of a profile."""
+    key = (id(profile_data), id(features))
+    info = _PROFILE_INFOS.get(key)
+    if (
+        info is None
+        or info.stale
+        or info.profile_data is not profile_data
+        or info.features_data is not features
+    ):
+        info = ProfileInfo(profile_data, features)
+        _PROFILE_INFOS.put(key, info)
+    return info
+
 
 class BaseProfile:
     """This represents a printer profile.
@@ -99,36 +385,73 @@ class BaseProfile:
     features, colors and more.
     """
 
+    #: Data of the profile from the printer database.
+    #:
+    #: The features, code pages, columns and media of the profile are computed from it
+    #: once. Replacing it is picked up automatically, but after changing it in place,
+    #: e.g. ``profile.profile_data["media"]["width"]["pixels"] = 384``,
+    #: :py:meth:`refresh` has to be called, otherwise the old values are still used.
     profile_data: Dict[str, Any] = {}
 
     def __getattr__(self, name):
         """Get a data element from the profile."""
         return self.profile_data[name]
 
+    @property
+    def info(self) -> ProfileInfo:
+        """Return the precomputed data of the profile.
+
+        It is computed again if the profile data or the features are replaced.
+        If they are changed in place, call :py:meth:`refresh` afterwards.
+        """
+        profile_data = self.profile_data
+        try:
+            features = self.features
+        except KeyError:
+            features = _NO_FEATURES
+        info = self.__dict__.get("_info")
+        if (
+            info is None
+            or info.stale
+            or info.profile_data is not profile_data
+            or info.features_data is not features
+        ):
+            info = _get_profile_info(profile_data, features)
+            self.__dict__["_info"] = info
+        return info
+
+    def refresh(self) -> None:
+        """Compute the precomputed data again after the profile data has been changed in place.
+
+        E.g. after ``profile.profile_data["media"]["width"]["pixels"] = 384``.
+        All profile objects that share the data see the change.
+        """
+        self.info.stale = True
+
     def get_font(self, font) -> int:
         """Return the escpos index for `font`.
 
         Makes sure that the requested `font` is valid.
         """
         font = {"a": 0, "b": 1}.get(font, font)
-        if not str(font) in self.fonts:
+        if not str(font) in self.info.columns:
             raise NotSupported(f'"{font}" is not a valid font in the current profile')
         return font
 
     def get_columns(self, font) -> int:
         """Return the number of columns for the given font."""
         font = self.get_font(font)
-        columns = self.fonts[str(font)]["columns"]
+        columns = self.info.columns[str(font)]
         assert type(columns) is int
         return columns
 
     def supports(self, feature) -> bool:
         """Return true/false for the given feature."""
-        return self.features.get(feature)
+        return feature in self.info.features
 
-    def get_code_pages(self) -> Dict[str, int]:
-        """Return the support code pages as a ``{name: index}`` dict."""
-        return {v: k for k, v in self.codePages.items()}
+    def get_code_pages(self) -> Mapping[str, str]:
+        """Return the support code pages as a read-only ``{name: slot}`` mapping."""
+        return self.info.code_pages
 
 
 def get_profile(name: Optional[str] = None, **kwargs):
@@ -143,7 +466,30 @@ def get_profile(name: Optional[str] = None, **kwargs):
     return clazz(**kwargs)
 
 
-CLASS_CACHE = {}
+CLASS_CACHE: Dict[str, Type[BaseProfile]] = {}
+
+
+class _ProfileData:
+    """Data of a profile in the printer database, looked up on access.
+
+    Used as ``profile_data`` of the generated profile classes, so that the database
+    is only loaded once a profile is used. Instances can still replace it.
+    """
+
+    def __init__(self, name: str) -> None:
+        """Initialize descriptor."""
+        self.name = name
+
+    def __get__(self, instance, owner) -> Dict[str, Any]:
+        """Return the data of the profile."""
+        return get_capabilities()["profiles"][self.name]
+
+
+def _create_profile_class(name: str) -> Type[BaseProfile]:
+    """Generate a profile class for the given profile name."""
+    profile_name = clean(name)
+    class_name = f"{profile_name[0].upper()}{profile_name[1:]}Profile"
+    return type(class_name, (BaseProfile,), {"profile_data": _ProfileData(name)})
 
 
 def get_profile_class(name: str) -> Type[BaseProfile]:
@@ -153,12 +499,10 @@ def get_profile_class(name: str) -> Type[BaseProfile]:
     database, then generate dynamically a class.
     """
     if name not in CLASS_CACHE:
-        profiles: Dict[str, Any] = CAPABILITIES["profiles"]
-        profile_data = profiles[name]
-        profile_name = clean(name)
-        class_name = f"{profile_name[0].upper()}{profile_name[1:]}Profile"
-        new_class = type(class_name, (BaseProfile,), {"profile_data": profile_data})
-        CLASS_CACHE[name] = new_class
+        profiles: Dict[str, Any] = get_capabilities()["profiles"]
+        if name not in profiles:
+            raise KeyError(name)
+        CLASS_CACHE[name] = _create_profile_class(name)
 
     return CLASS_CACHE[name]
 
@@ -173,7 +517,10 @@ def clean(s: str) -> str:
 
 
 # mute the mypy type issue with this dynamic base class function for now (: Any)
-ProfileBaseClass: Any = get_profile_class("default")
+# the class of the default profile is created without loading the database
+ProfileBaseClass: Any = CLASS_CACHE.setdefault(
+    "default", _create_profile_class("default")
+)
 
 
 class Profile(ProfileBaseClass):
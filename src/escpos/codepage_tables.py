@@ -0,0 +1,159 @@
+"""Precomputed code page tables.
+
+The characters 128-255 of every code page in the capabilities database are computed
+when the package is built and shipped as a compact binary file.
+At runtime the file is mapped into memory on first use and a code page is read from
+it in a single decoding step, instead of being assembled character by character.
+The characters that can be encoded, the other direction, are derived from these tables
+by :py:func:`codecs.charmap_build` in C, see :py:class:`escpos.magicencode.Encoder`.
+
+The file records the digest of the capabilities file it was built from.
+If the printer database is replaced, e.g. with ``ESCPOS_CAPABILITIES_FILE``,
+the tables are ignored and the code pages are computed at runtime as before.
+
+File format, all numbers little endian::
+
+    magic (16 bytes) | digest (32 bytes, SHA-256 of the capabilities file) | count (uint32)
+    count * (name (32 bytes, ASCII, zero padded) | offset (uint32))
+    count * (128 characters, UTF-32-LE)
+
+This module only depends on the standard library, so that it can be used by the
+build script without importing the package.
+
+:author: python-escpos developers
+:organization: `python-escpos <https://github.com/python-escpos>`_
+:copyright: Copyright (c) 2026 python-escpos
+:license: MIT
+"""
+
+import hashlib
+import json
+import mmap
+import struct
+from os import path
+from typing import Dict, Optional, Tuple
+
+MAGIC = b"ESCPOS-CODEPAGE1"
+HEADER = struct.Struct("<16s32sI")
+INDEX_ENTRY = struct.Struct("<32sI")
+#: size of a table: 128 characters in UTF-32
+TABLE_SIZE = 128 * 4
+
+#: file name of the tables in the package
+TABLES_FILENAME = "codepages.bin"
+
+
+def file_digest(filename: str) -> bytes:
+    """Return the SHA-256 digest of a file."""
+    with open(filename, "rb") as digest_file:
+        return hashlib.sha256(digest_file.read()).digest()
+
+
+def codepage_chars(codepage: Dict) -> Optional[str]:
+    """Compute the characters 128-255 of a code page.
+
+    Undecodable bytes are represented by a space.
+
+    :param codepage: encoding data of the capabilities database
+    :return: 128 characters, None if the characters of the code page are not known
+    """
+    if "data" in codepage:
+        chars = "".join(codepage["data"])
+        assert len(chars) == 128
+        return chars
+    if "python_encode" in codepage:
+        encodable_chars = [" "] * 128
+        for i in range(0, 128):
+            try:
+                encodable_chars[i] = bytes([i + 128]).decode(codepage["python_encode"])
+            except UnicodeDecodeError:
+                # Non-encodable character, just skip it
+                pass
+        return "".join(encodable_chars)
+    return None
+
+
+def build_tables(encodings: Dict[str, Dict], digest: bytes) -> bytes:
+    """Build the binary tables of the code pages.
+
+    :param encodings: encodings of the capabilities database
+    :param digest: digest of the capabilities file
+    """
+    tables = []
+    for name, codepage in sorted(encodings.items()):
+        chars = codepage_chars(codepage)
+        if chars is not None:
+            tables.append((name, chars.encode("utf-32-le")))
+
+    offset = HEADER.size + INDEX_ENTRY.size * len(tables)
+    index = []
+    for name, table in tables:
+        index.append(INDEX_ENTRY.pack(name.encode("ascii"), offset))
+        offset += len(table)
+    return b"".join(
+        [HEADER.pack(MAGIC, digest, len(tables))]
+        + index
+        + [table for _, table in tables]
+    )
+
+
+def write_tables(capabilities_filename: str, tables_filename: str) -> None:
+    """Build the binary tables from a capabilities file and write them.
+
+    :param capabilities_filename: capabilities file to build the tables from
+    :param tables_filename: file to write
+    """
+    with open(capabilities_filename, encoding="utf-8") as capabilities_file:
+        encodings = json.load(capabilities_file)["encodings"]
+    data = build_tables(encodings, file_digest(capabilities_filename))
+    with open(tables_filename, "wb") as tables_file:
+        tables_file.write(data)
+
+
+class CodePageTables:
+    """Lazily loaded binary code page tables."""
+
+    def __init__(self, tables_filename: str, capabilities_filename: str) -> None:
+        """Initialize tables, the file is only read on first use.
+
+        :param tables_filename: file with the binary tables
+        :param capabilities_filename: capabilities file that is in use
+        """
+        self.tables_filename = tables_filename
+        self.capabilities_filename = capabilities_filename
+        self._loaded = False
+        self._buffer: Optional[mmap.mmap] = None
+        self._index: Dict[str, int] = {}
+
+    def _load(self) -> Tuple[Optional[mmap.mmap], Dict[str, int]]:
+        """Map the file into memory and read the index, if it matches the capabilities."""
+        if self._loaded:
+            return self._buffer, self._index
+        self._loaded = True
+        if not path.exists(self.tables_filename):
+            return None, {}
+        with open(self.tables_filename, "rb") as tables_file:
+            buffer = mmap.mmap(tables_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, digest, count = HEADER.unpack_from(buffer)
+        if magic != MAGIC or digest != file_digest(self.capabilities_filename):
+            buffer.close()
+            return None, {}
+        for position in range(count):
+            name, offset = INDEX_ENTRY.unpack_from(
+                buffer, HEADER.size + position * INDEX_ENTRY.size
+            )
+            self._index[name.rstrip(b"\0").decode("ascii")] = offset
+        self._buffer = buffer
+        return self._buffer, self._index
+
+    def get(self, encoding: str) -> Optional[str]:
+        """Return the characters 128-255 of a code page.
+
+        :param encoding: name of the encoding
+        :return: 128 characters, None if the code page is not in the tables
+        """
+        buffer, index = self._load()
+        if buffer is None or encoding not in index:
+            return None
+        offset = index[encoding]
+        return buffer[offset : offset + TABLE_SIZE].decode("utf-32-le")
@@ -1,5 +1,9 @@
 """Helper module for code page handling."""
-from .capabilities import CAPABILITIES
+from os import path
+from typing import Any, Dict, Optional
+
+from .capabilities import capabilities_path, get_capabilities
+from .codepage_tables import TABLES_FILENAME, CodePageTables, codepage_chars
 
 
 class CodePageManager:
@@ -8,9 +12,26 @@ class CodePageManager:
     Information as defined in escpos-printer-db.
     """
 
-    def __init__(self, data):
-        """Initialize code page manager."""
-        self.data = data
+    def __init__(self, data=None, tables: Optional[CodePageTables] = None):
+        """Initialize code page manager.
+
+        :param data: encodings of the capabilities database,
+            *default*: loaded from the database on first use
+        :param tables: precomputed code page tables, see :py:mod:`escpos.codepage_tables`
+        """
+        self._data = data
+        self.tables = tables
+
+    @property
+    def data(self) -> Dict[str, Any]:
+        """Return the encodings, load them from the database on first use."""
+        if self._data is None:
+            self._data = get_capabilities()["encodings"]
+        return self._data
+
+    @data.setter
+    def data(self, data: Dict[str, Any]) -> None:
+        self._data = data
 
     @staticmethod
     def get_encoding_name(encoding):
@@ -24,5 +45,24 @@ class CodePageManager:
         """Return the encoding data."""
         return self.data[encoding]
 
+    def get_characters(self, encoding: str) -> Optional[str]:
+        """Return the characters 128-255 of a code page.
+
+        The characters are read from the precomputed tables if they are available
+        and computed from the encoding data otherwise.
+
+        :param encoding: The name of the encoding.
+        :return: 128 characters, None if the characters of the code page are not known
+        """
+        if self.tables is not None:
+            chars = self.tables.get(encoding)
+            if chars is not None:
+                return chars
+        return codepage_chars(self.get_encoding(encoding))
+
 
-CodePages = CodePageManager(CAPABILITIES["encodings"])
+CodePages = CodePageManager(
+    tables=CodePageTables(
+        path.join(path.dirname(__file__), TABLES_FILENAME), str(capabilities_path)
+    ),
+)
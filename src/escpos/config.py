@@ -89,7 +89,11 @@ class Config:
             }
             self._printer_name = class_names.get(printer_name.lower(), printer_name)
 
-            if not self._printer_name or not hasattr(printer, self._printer_name):
+            # the printer implementation is only imported when the printer is created
+            if not self._printer_name or not (
+                self._printer_name in printer.__all__
+                or hasattr(printer, self._printer_name)
+            ):
                 raise exceptions.ConfigSyntaxError(
                     f'Printer type "{self._printer_name}" is invalid'
                 )
@@ -192,6 +192,13 @@ LINESPACING_FUNCS: Dict[int, bytes] = {
 #: the code page to use. We use escpos-printer-db as the data source.
 CODEPAGE_CHANGE: bytes = ESC + b"\x74"
 
+#: Select kanji mode: characters of the multi-byte encoding of the printer are printed
+KANJI_MODE_ON: bytes = FS + b"&"
+#: Cancel kanji mode: bytes are printed with the selected code page
+KANJI_MODE_OFF: bytes = FS + b"."
+#: Select Shift JIS as kanji code system, required by Japanese printers
+KANJI_CODE_SYSTEM_SHIFT_JIS: bytes = FS + b"C\x01"
+
 # Barcode format
 _SET_BARCODE_TXT_POS = lambda n: GS + b"H" + n
 BARCODE_TXT_OFF: bytes = _SET_BARCODE_TXT_POS(b"\x00")  #: HRI barcode chars OFF
@@ -286,6 +293,32 @@ QR_MODEL_1: int = 1
 QR_MODEL_2: int = 2
 QR_MICRO: int = 3
 
+# 2D code types (cn) of GS ( k
+CODE2D_PDF417: bytes = b"0"
+CODE2D_QR: bytes = b"1"
+CODE2D_MAXICODE: bytes = b"2"
+CODE2D_AZTEC: bytes = b"5"
+CODE2D_DATAMATRIX: bytes = b"6"
+
+# PDF417 options
+PDF417_STANDARD: int = 0
+PDF417_TRUNCATED: int = 1
+
+# MaxiCode modes
+MAXICODE_MODE_2: int = 2  # structured carrier message, numeric postal code
+MAXICODE_MODE_3: int = 3  # structured carrier message, alphanumeric postal code
+MAXICODE_MODE_4: int = 4  # standard symbol
+MAXICODE_MODE_5: int = 5  # full error correction
+MAXICODE_MODE_6: int = 6  # reader programming
+
+# DataMatrix symbol types
+DATAMATRIX_SQUARE: int = 0
+DATAMATRIX_RECTANGLE: int = 1
+
+# Aztec code symbol types
+AZTEC_FULL_RANGE: int = 0
+AZTEC_COMPACT: int = 1
+
 # Image format
 # NOTE: _PRINT_RASTER_IMG is the obsolete ESC/POS "print raster bit image"
 #       command. The constants include a fragment of the data's header.
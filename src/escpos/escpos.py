@@ -16,19 +16,32 @@ import textwrap
 import time
 import warnings
 from abc import ABCMeta, abstractmethod  # abstract base class support
+from itertools import zip_longest
 from re import match as re_match
 from types import TracebackType
-from typing import Any, Literal, Optional, Union
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    List,
+    Literal,
+    Optional,
+    Sequence,
+    Union,
+)
+from unicodedata import combining, east_asian_width
 
-import barcode
-import qrcode
 import six
-from barcode.writer import ImageWriter
 
-from escpos.capabilities import get_profile
-from escpos.image import EscposImage
+from escpos.cache import LRUCache
+from escpos.capabilities import NotSupported, get_profile
 
 from .constants import (
+    AZTEC_COMPACT,
+    AZTEC_FULL_RANGE,
     BARCODE_FONT_A,
     BARCODE_FONT_B,
     BARCODE_FORMATS,
@@ -43,11 +56,18 @@ from .constants import (
     CD_KICK_2,
     CD_KICK_5,
     CD_KICK_DEC_SEQUENCE,
+    CODE2D_AZTEC,
+    CODE2D_DATAMATRIX,
+    CODE2D_MAXICODE,
+    CODE2D_PDF417,
+    CODE2D_QR,
     CTL_CR,
     CTL_FF,
     CTL_LF,
     CTL_SET_HT,
     CTL_VT,
+    DATAMATRIX_RECTANGLE,
+    DATAMATRIX_SQUARE,
     ESC,
     GS,
     HW_INIT,
@@ -58,11 +78,16 @@ from .constants import (
     LINE_DISPLAY_OPEN,
     LINESPACING_FUNCS,
     LINESPACING_RESET,
+    MAXICODE_MODE_2,
+    MAXICODE_MODE_4,
+    MAXICODE_MODE_6,
     NUL,
     PANEL_BUTTON_OFF,
     PANEL_BUTTON_ON,
     PAPER_FULL_CUT,
     PAPER_PART_CUT,
+    PDF417_STANDARD,
+    PDF417_TRUNCATED,
     QR_ECLEVEL_H,
     QR_ECLEVEL_L,
     QR_ECLEVEL_M,
@@ -95,7 +120,13 @@ from .exceptions import (
     SetVariableError,
     TabPosError,
 )
-from .magicencode import MagicEncode
+from .magicencode import IncrementalEncoder, MagicEncode
+
+if TYPE_CHECKING:
+    from escpos.image import EscposImage
+
+# barcode, qrcode and PIL are imported on first use, so that printing text
+# doesn't pay for importing them
 
 # Remove special characters and whitespaces of the supported barcode names,
 # convert to uppercase and map them to their original names.
@@ -104,10 +135,28 @@ HW_BARCODE_NAMES = {
     for bc_type in BARCODE_TYPES.values()
     for name in bc_type
 }
-SW_BARCODE_NAMES = {
-    "".join([char for char in name.upper() if char.isalnum()]): name
-    for name in barcode.PROVIDED_BARCODES
-}
+_sw_barcode_names: Optional[Dict[str, str]] = None
+
+
+def _get_sw_barcode_names() -> Dict[str, str]:
+    """Return the names of the barcodes of the software renderer, like ``HW_BARCODE_NAMES``."""
+    global _sw_barcode_names
+    if _sw_barcode_names is None:
+        import barcode
+
+        _sw_barcode_names = {
+            "".join([char for char in name.upper() if char.isalnum()]): name
+            for name in barcode.PROVIDED_BARCODES
+        }
+    return _sw_barcode_names
+
+
+def __getattr__(name: str) -> Any:
+    """Create ``SW_BARCODE_NAMES`` on first access."""
+    if name == "SW_BARCODE_NAMES":
+        return _get_sw_barcode_names()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 Alignment = Union[Literal["center", "left", "right", "justify"], str]
 
@@ -128,6 +177,9 @@ class Escpos(object, metaclass=ABCMeta):
     # sleep time in fragments:
     _sleep_in_fragment_ms: int = 0
 
+    # cache for rendered QR codes and barcodes:
+    render_cache: Optional[LRUCache] = None
+
     def __init__(self, profile=None, magic_encode_args=None, **kwargs) -> None:
         """Initialize ESCPOS Printer.
 
@@ -183,6 +235,21 @@ class Escpos(object, metaclass=ABCMeta):
         """
         raise NotImplementedError()
 
+    def raw_bytes(self, data: bytes) -> None:
+        """Send ESC/POS commands that have been prepared before to the printer.
+
+        E.g. the output of a :py:class:`escpos.printer.Dummy` printer, of
+        :py:func:`escpos.batch.render_batch` or a binary file of commands.
+        The data is sent as it is, the state of this object, e.g. the code page
+        that magic encode assumes, is not updated.
+
+        :param data: ESC/POS commands
+        :raises TypeError: if the data is not binary
+        """
+        if not isinstance(data, (bytes, bytearray, memoryview)):
+            raise TypeError(f"data must be bytes, not {type(data).__name__}")
+        self._raw(bytes(data))
+
     def set_sleep_in_fragment(self, sleep_time_ms: int) -> None:
         """Configures the currently active sleep time after sending a fragment.
 
@@ -198,6 +265,19 @@ class Escpos(object, metaclass=ABCMeta):
         """Sleeps the preconfigured time after sending a fragment."""
         time.sleep(self._sleep_in_fragment_ms / 1000)
 
+    def set_render_cache(self, render_cache: Optional[LRUCache]) -> None:
+        """Configure a cache for QR codes and barcodes that are rendered in software.
+
+        Codes that are printed repeatedly, like loyalty QR codes or SKU barcodes,
+        are then rendered only once. The cache stores the final commands, keyed on
+        the content and every parameter that affects the rendering.
+        A cache can be shared between printers.
+
+        :param render_cache: cache to use, e.g. :py:class:`~escpos.cache.LRUCache`,
+            or None to disable caching
+        """
+        self.render_cache = render_cache
+
     def image(
         self,
         img_source,
@@ -225,7 +305,12 @@ class Escpos(object, metaclass=ABCMeta):
         When trying to center an image make sure you have initialized the printer with a valid profile, that
         contains a media width pixel field. Otherwise the centering will have no effect.
 
-        :param img_source: PIL image or filename to load: `jpg`, `gif`, `png` or `bmp`
+        Images that are already in the raster format of the printer can be passed as
+        :py:class:`~escpos.image.EscposImage`, created from a buffer of packed 1-bpp rows,
+        or as binary PBM file. They are sent to the printer without any conversion.
+
+        :param img_source: PIL image, :py:class:`~escpos.image.EscposImage`
+            or filename to load: `jpg`, `gif`, `png`, `bmp` or `pbm`
         :param high_density_vertical: print in high density in vertical direction *default:* True
         :param high_density_horizontal: print in high density in horizontal direction *default:* True
         :param impl: choose image printing mode between `bitImageRaster`, `graphics` or `bitImageColumn`
@@ -233,42 +318,101 @@ class Escpos(object, metaclass=ABCMeta):
         :param center: Center image horizontally *default:* False
 
         """
-        im = EscposImage(img_source)
+        self._send_image_fragments(
+            self._render_image(
+                img_source,
+                high_density_vertical=high_density_vertical,
+                high_density_horizontal=high_density_horizontal,
+                impl=impl,
+                fragment_height=fragment_height,
+                center=center,
+            )
+        )
 
-        try:
-            if self.profile.profile_data["media"]["width"]["pixels"] == "Unknown":
-                print(
-                    "The media.width.pixel field of the printer profile is not set. "
-                    + "The center flag will have no effect."
-                )
+    def _render_image(
+        self,
+        img_source,
+        high_density_vertical: bool = True,
+        high_density_horizontal: bool = True,
+        impl: str = "bitImageRaster",
+        fragment_height: int = 960,
+        center: bool = False,
+    ) -> List[bytes]:
+        """Render an image into the commands for each of its fragments.
 
-            max_width = int(self.profile.profile_data["media"]["width"]["pixels"])
+        See :meth:`.image()` for the parameters.
+        """
+        from .image import EscposImage
+
+        if isinstance(img_source, EscposImage):
+            return self._render_escpos_image(
+                img_source,
+                high_density_vertical,
+                high_density_horizontal,
+                impl,
+                fragment_height,
+                center,
+            )
+        # an image loaded here is closed right after rendering, e.g. to unmap a PBM file
+        with EscposImage(img_source) as im:
+            return self._render_escpos_image(
+                im,
+                high_density_vertical,
+                high_density_horizontal,
+                impl,
+                fragment_height,
+                center,
+            )
 
+    def _render_escpos_image(
+        self,
+        im: EscposImage,
+        high_density_vertical: bool,
+        high_density_horizontal: bool,
+        impl: str,
+        fragment_height: int,
+        center: bool,
+    ) -> List[bytes]:
+        """Render a loaded image into the commands for each of its fragments."""
+        from .image import EscposImage
+
+        max_width = self.profile.info.media_width
+        if max_width is not None:
             if im.width > max_width:
                 raise ImageWidthError(f"{im.width} > {max_width}")
 
             if center:
+                # center a copy, the image of the caller is left untouched
+                im = EscposImage(im)
                 im.center(max_width)
-        except KeyError:
+        elif center:
             # If the printer's pixel width is not known, print anyways...
-            pass
-        except ValueError:
-            # If the max_width cannot be converted to an int, print anyways...
-            pass
+            print(
+                "The media.width.pixel field of the printer profile is not set. "
+                + "The center flag will have no effect."
+            )
 
         if im.height > fragment_height:
-            fragments = im.split(fragment_height)
-            for fragment in fragments:
-                self.image(
-                    fragment,
-                    high_density_vertical=high_density_vertical,
-                    high_density_horizontal=high_density_horizontal,
-                    impl=impl,
-                    fragment_height=fragment_height,
+            return [
+                self._render_image_fragment(
+                    fragment, high_density_vertical, high_density_horizontal, impl
                 )
-                self._sleep_in_fragment()
-            return
+                for fragment in im.split(fragment_height)
+            ]
+        return [
+            self._render_image_fragment(
+                im, high_density_vertical, high_density_horizontal, impl
+            )
+        ]
 
+    def _render_image_fragment(
+        self,
+        im: EscposImage,
+        high_density_vertical: bool,
+        high_density_horizontal: bool,
+        impl: str,
+    ) -> bytes:
+        """Render the command for a single image fragment."""
         if impl == "bitImageRaster":
             # GS v 0, raster format bit image
             density_byte = (0 if high_density_horizontal else 1) + (
@@ -281,7 +425,7 @@ class Escpos(object, metaclass=ABCMeta):
                 + self._int_low_high(im.width_bytes, 2)
                 + self._int_low_high(im.height, 2)
             )
-            self._raw(header + im.to_raster_format())
+            return header + im.to_raster_format()
 
         if impl == "graphics":
             # GS ( L raster format graphics
@@ -294,8 +438,9 @@ class Escpos(object, metaclass=ABCMeta):
             xm = b"\x01" if high_density_horizontal else b"\x02"
             header = tone + xm + ym + colors + img_header
             raster_data = im.to_raster_format()
-            self._image_send_graphics_data(b"0", b"p", header + raster_data)
-            self._image_send_graphics_data(b"0", b"2", b"")
+            return self._image_graphics_data(
+                b"0", b"p", header + raster_data
+            ) + self._image_graphics_data(b"0", b"2", b"")
 
         if impl == "bitImageColumn":
             # ESC *, column format bit image
@@ -312,17 +457,67 @@ class Escpos(object, metaclass=ABCMeta):
             for blob in im.to_column_format(high_density_vertical):
                 outp.append(header + blob + b"\n")
             outp.append(ESC + b"2")  # Reset line-feed size
-            self._raw(b"".join(outp))
+            return b"".join(outp)
+
+        return b""
+
+    def _image_cached(
+        self, key: Hashable, render: Callable[[], Any], **image_arguments
+    ) -> None:
+        """Print an image that is created by `render`.
+
+        If a render cache is configured, the rendered commands are cached under `key`,
+        the image arguments and the media width of the profile.
+
+        :param key: key that identifies the image created by `render`
+        :param render: function that creates the image
+        :param image_arguments: arguments passed to :meth:`.image()`
+        """
+        if self.render_cache is None:
+            self.image(render(), **image_arguments)
+            return
+
+        key = (
+            key,
+            tuple(sorted(image_arguments.items())),
+            self.profile.info.media_width,
+        )
+        fragments = self.render_cache.get(key)
+        if fragments is None:
+            fragments = tuple(self._render_image(render(), **image_arguments))
+            self.render_cache.put(key, fragments)
+        self._send_image_fragments(fragments)
+
+    def _send_image_fragments(self, fragments: Sequence[bytes]) -> None:
+        """Send the commands of rendered image fragments.
+
+        If the image has been fragmented, sleep after each fragment.
+        """
+        if len(fragments) == 1:
+            self._raw(fragments[0])
+            return
+        for fragment in fragments:
+            self._raw(fragment)
+            self._sleep_in_fragment()
 
     def _image_send_graphics_data(self, m, fn, data) -> None:
         """Calculate and send correct data length for `GS ( L`.
 
+        :param m: Modifier//variant for function. Usually '0'
+        :param fn: Function number to use, as byte
+        :param data: Data to send
+        """
+        self._raw(self._image_graphics_data(m, fn, data))
+
+    def _image_graphics_data(self, m, fn, data) -> bytes:
+        """Calculate correct data length for `GS ( L` and return the command.
+
         :param m: Modifier//variant for function. Usually '0'
         :param fn: Function number to use, as byte
         :param data: Data to send
         """
         header = self._int_low_high(len(data) + 2, 2)
-        self._raw(GS + b"(L" + header + m + fn + data)
+        return GS + b"(L" + header + m + fn + data
 
     def qr(
         self,
@@ -330,7 +525,7 @@ class Escpos(object, metaclass=ABCMeta):
         ec=QR_ECLEVEL_L,
         size=3,
         model=QR_MODEL_2,
-        native=False,
+        native: Union[bool, Literal["auto"]] = False,
         center=False,
         impl=None,
         image_arguments: Optional[dict] = None,
@@ -345,7 +540,10 @@ class Escpos(object, metaclass=ABCMeta):
         :param model: QR code model to use. Must be one of QR_MODEL_1, QR_MODEL_2 (default) or QR_MICRO (not supported
             by all printers).
         :param native: True to render the code on the printer, False to render the code as an image and send it to the
-            printer (Default)
+            printer (Default).
+            "auto" renders the code on the printer if the profile supports QR codes and the requested options
+            can be rendered natively, otherwise the code is sent as an image.
+            Native rendering transfers far less data to the printer.
         :param center: Centers the code *default:* False
         :param impl: Image-printing-implementation, refer to :meth:`.image()` for details
         :param image_arguments: arguments passed to :meth:`.image()`.
@@ -363,6 +561,8 @@ class Escpos(object, metaclass=ABCMeta):
         if content == "":
             # Handle edge case by printing nothing.
             return
+        if native == "auto":
+            native = self._qr_native_capable(model, center, impl, image_arguments)
         if not native:
             # impl is deprecated in favor of image_arguments
             if impl:
@@ -382,23 +582,32 @@ class Escpos(object, metaclass=ABCMeta):
                 raise ValueError(
                     "Invalid QR model for qrlib rendering (must be QR_MODEL_2)"
                 )
+            import qrcode
+
+            from .image import EscposImage
+
             python_qr_ec = {
                 QR_ECLEVEL_H: qrcode.constants.ERROR_CORRECT_H,
                 QR_ECLEVEL_L: qrcode.constants.ERROR_CORRECT_L,
                 QR_ECLEVEL_M: qrcode.constants.ERROR_CORRECT_M,
                 QR_ECLEVEL_Q: qrcode.constants.ERROR_CORRECT_Q,
             }
-            qr_code = qrcode.QRCode(
-                version=None, box_size=size, border=1, error_correction=python_qr_ec[ec]
-            )
-            qr_code.add_data(content)
-            qr_code.make(fit=True)
-            qr_img = qr_code.make_image()
-            im = qr_img._img.convert("RGB")
 
-            # Convert the RGB image in printable image
+            def render_qr():
+                qr_code = qrcode.QRCode(
+                    version=None,
+                    border=1,
+                    error_correction=python_qr_ec[ec],
+                )
+                qr_code.add_data(content)
+                qr_code.make(fit=True)
+                # pack the modules straight into raster data, no image is drawn
+                return EscposImage.from_matrix(qr_code.get_matrix(), scale=size)
+
             self.text("\n")
-            self.image(im, **image_arguments)
+            self._image_cached(
+                ("qr", content, ec, size, model), render_qr, **image_arguments
+            )
             self.text("\n")
             self.text("\n")
             return
@@ -409,7 +618,7 @@ class Escpos(object, metaclass=ABCMeta):
             )
 
         # Native 2D code printing
-        cn = b"1"  # Code type for QR code
+        cn = CODE2D_QR
         # Select model: 1, 2 or micro.
         self._send_2d_code_data(
             six.int2byte(65), cn, six.int2byte(48 + model) + six.int2byte(0)
@@ -419,7 +628,296 @@ class Escpos(object, metaclass=ABCMeta):
         # Set error correction level: L, M, Q, or H
         self._send_2d_code_data(six.int2byte(69), cn, six.int2byte(48 + ec))
         # Send content & print
-        self._send_2d_code_data(six.int2byte(80), cn, content.encode("utf-8"), b"0")
+        self._send_2d_code(cn, content.encode("utf-8"))
+
+    def _qr_native_capable(
+        self, model: int, center: bool, impl, image_arguments: Optional[dict]
+    ) -> bool:
+        """Decide whether a QR code can be rendered natively by the printer.
+
+        Native rendering requires support for QR codes in the profile.
+        Centering and image options can only be applied to software rendered codes,
+        while other models than QR_MODEL_2 can only be rendered natively.
+
+        :param model: QR code model, see :meth:`.qr()`
+        :param center: whether the code shall be centered
+        :param impl: image implementation, see :meth:`.qr()`
+        :param image_arguments: arguments for :meth:`.image()`, see :meth:`.qr()`
+        """
+        if not self.profile.supports("qrCode"):
+            return False
+        if model != QR_MODEL_2:
+            return True
+        return not (center or impl or image_arguments)
+
+    def pdf417(
+        self,
+        content: Union[str, bytes],
+        columns: int = 0,
+        rows: int = 0,
+        width: int = 3,
+        row_height: int = 3,
+        ec: int = 1,
+        options: int = PDF417_STANDARD,
+        native: Union[bool, Literal["auto"]] = "auto",
+    ) -> None:
+        """Print PDF417 code.
+
+        The code is rendered natively if the profile supports the feature `pdf417Code`.
+        Otherwise it is rendered in software, which requires the optional package
+        `pdf417gen`. Truncated codes can only be rendered natively.
+
+        :param content: data to encode, str is encoded as UTF-8
+        :param columns: number of data columns (1-30), 0 to let the printer decide
+        :param rows: number of rows (3-90), 0 to let the printer decide
+        :param width: width of a module in dots (2-8)
+        :param row_height: height of a row as multiple of the module width (2-8)
+        :param ec: error correction level (0-8)
+        :param options: PDF417_STANDARD or PDF417_TRUNCATED
+        :param native: True to render the code on the printer, False to render it as image,
+            "auto" to decide by the profile (Default)
+        :raises: :py:exc:`ValueError` for invalid parameters,
+            :py:exc:`~escpos.exceptions.BarcodeTypeError` if the code can't be rendered
+        """
+        if not 0 <= columns <= 30:
+            raise ValueError("Invalid number of columns (must be 0-30)")
+        if rows != 0 and not 3 <= rows <= 90:
+            raise ValueError("Invalid number of rows (must be 0 or 3-90)")
+        if not 2 <= width <= 8:
+            raise ValueError("Invalid module width (must be 2-8)")
+        if not 2 <= row_height <= 8:
+            raise ValueError("Invalid row height (must be 2-8)")
+        if not 0 <= ec <= 8:
+            raise ValueError("Invalid error correction level (must be 0-8)")
+        if options not in (PDF417_STANDARD, PDF417_TRUNCATED):
+            raise ValueError(
+                "Invalid options (must be PDF417_STANDARD or PDF417_TRUNCATED)"
+            )
+        data = self._2d_code_content(content)
+
+        if not self._2d_code_native("pdf417Code", native):
+            if options == PDF417_TRUNCATED:
+                raise BarcodeTypeError(
+                    "Truncated PDF417 codes can only be rendered natively"
+                )
+            try:
+                import pdf417gen  # type: ignore [import-not-found]
+            except ImportError:
+                raise BarcodeTypeError(
+                    "PDF417 is not supported by the profile and software rendering "
+                    "requires the package pdf417gen"
+                )
+            codes = pdf417gen.encode(
+                data, columns=columns or 6, security_level=ec, force_rows=rows or None
+            )
+            self.image(
+                pdf417gen.render_image(codes, scale=width, ratio=row_height, padding=0)
+            )
+            return
+
+        cn = CODE2D_PDF417
+        self._send_2d_code_data(six.int2byte(65), cn, six.int2byte(columns))
+        self._send_2d_code_data(six.int2byte(66), cn, six.int2byte(rows))
+        self._send_2d_code_data(six.int2byte(67), cn, six.int2byte(width))
+        self._send_2d_code_data(six.int2byte(68), cn, six.int2byte(row_height))
+        # Error correction by level
+        self._send_2d_code_data(six.int2byte(69), cn, six.int2byte(48 + ec), b"0")
+        self._send_2d_code_data(six.int2byte(70), cn, six.int2byte(options))
+        self._send_2d_code(cn, data)
+
+    def datamatrix(
+        self,
+        content: Union[str, bytes],
+        size: int = 3,
+        symbol: int = DATAMATRIX_SQUARE,
+        columns: int = 0,
+        rows: int = 0,
+        native: Union[bool, Literal["auto"]] = True,
+    ) -> None:
+        """Print DataMatrix code.
+
+        The code is rendered natively by default. The printer database doesn't tell
+        which printers support DataMatrix codes, so the capability can't be detected:
+        with `native="auto"` the code is only rendered natively if a custom profile has
+        the feature `dataMatrixCode`.
+        Otherwise it is rendered in software, which requires the optional package
+        `pylibdmtx`. In software, set both columns and rows to one of the
+        ECC 200 symbol sizes, or neither.
+
+        :param content: data to encode, str is encoded as UTF-8
+        :param size: size of a module in dots (2-16)
+        :param symbol: DATAMATRIX_SQUARE or DATAMATRIX_RECTANGLE
+        :param columns: number of columns (10-144), 0 to let the printer decide
+        :param rows: number of rows (8-144), 0 to let the printer decide
+        :param native: True to render the code on the printer (Default),
+            False to render it as image, "auto" to decide by the profile
+        :raises: :py:exc:`ValueError` for invalid parameters,
+            :py:exc:`~escpos.exceptions.BarcodeTypeError` if the code can't be rendered
+        """
+        if not 2 <= size <= 16:
+            raise ValueError("Invalid module size (must be 2-16)")
+        if symbol not in (DATAMATRIX_SQUARE, DATAMATRIX_RECTANGLE):
+            raise ValueError(
+                "Invalid symbol type (must be DATAMATRIX_SQUARE or DATAMATRIX_RECTANGLE)"
+            )
+        if not (0 <= columns <= 144 and 0 <= rows <= 144):
+            raise ValueError("Invalid number of columns or rows (must be 0-144)")
+        data = self._2d_code_content(content)
+
+        if not self._2d_code_native("dataMatrixCode", native):
+            try:
+                import pylibdmtx.pylibdmtx as dmtx  # type: ignore [import-not-found]
+                from PIL import Image
+            except ImportError:
+                raise BarcodeTypeError(
+                    "DataMatrix is not supported by the profile and software rendering "
+                    "requires the package pylibdmtx"
+                )
+            if columns and rows:
+                symbol_size = f"{rows}x{columns}"
+                if symbol_size not in dmtx.ENCODING_SIZE_NAMES:
+                    raise BarcodeTypeError(
+                        f"DataMatrix of {rows} rows and {columns} columns "
+                        "can't be rendered in software"
+                    )
+            elif columns or rows:
+                raise BarcodeTypeError(
+                    "Software rendered DataMatrix codes need both columns and rows, or none"
+                )
+            elif symbol == DATAMATRIX_RECTANGLE:
+                symbol_size = "RectAuto"
+            else:
+                symbol_size = "SquareAuto"
+            encoded = dmtx.encode(data, size=symbol_size)
+            image = Image.frombytes(
+                "RGB", (encoded.width, encoded.height), encoded.pixels
+            )
+            # libdmtx draws every module with 5 pixels, scale them to `size` dots
+            self.image(
+                image.resize(
+                    (encoded.width * size // 5, encoded.height * size // 5),
+                    Image.NEAREST,
+                )
+            )
+            return
+
+        cn = CODE2D_DATAMATRIX
+        self._send_2d_code_data(
+            six.int2byte(66),
+            cn,
+            six.int2byte(columns) + six.int2byte(rows),
+            six.int2byte(symbol),
+        )
+        self._send_2d_code_data(six.int2byte(67), cn, six.int2byte(size))
+        self._send_2d_code(cn, data)
+
+    def aztec(
+        self,
+        content: Union[str, bytes],
+        size: int = 3,
+        symbol: int = AZTEC_FULL_RANGE,
+        layers: int = 0,
+        ec: int = 23,
+        native: Union[bool, Literal["auto"]] = True,
+    ) -> None:
+        """Print Aztec code.
+
+        Aztec codes can only be rendered natively.
+        The printer database doesn't tell which printers support Aztec codes, so the
+        capability can't be detected: with `native="auto"` a custom profile has to have
+        the feature `aztecCode`.
+
+        :param content: data to encode, str is encoded as UTF-8
+        :param size: size of a module in dots (2-16)
+        :param symbol: AZTEC_FULL_RANGE or AZTEC_COMPACT
+        :param layers: number of data layers (1-32 full range, 1-4 compact), 0 to let the printer decide
+        :param ec: share of error correction data in percent (5-95)
+        :param native: True to render the code on the printer (Default), "auto" to decide by the profile
+        :raises: :py:exc:`ValueError` for invalid parameters,
+            :py:exc:`~escpos.exceptions.BarcodeTypeError` if the code can't be rendered
+        """
+        if not 2 <= size <= 16:
+            raise ValueError("Invalid module size (must be 2-16)")
+        if symbol not in (AZTEC_FULL_RANGE, AZTEC_COMPACT):
+            raise ValueError(
+                "Invalid symbol type (must be AZTEC_FULL_RANGE or AZTEC_COMPACT)"
+            )
+        if not 0 <= layers <= (32 if symbol == AZTEC_FULL_RANGE else 4):
+            raise ValueError("Invalid number of layers")
+        if not 5 <= ec <= 95:
+            raise ValueError("Invalid error correction (must be 5-95)")
+        data = self._2d_code_content(content)
+        if not self._2d_code_native("aztecCode", native):
+            raise BarcodeTypeError(
+                "Aztec codes can only be rendered natively, the profile lacks aztecCode"
+            )
+
+        cn = CODE2D_AZTEC
+        self._send_2d_code_data(
+            six.int2byte(66), cn, six.int2byte(layers), six.int2byte(symbol)
+        )
+        self._send_2d_code_data(six.int2byte(67), cn, six.int2byte(size))
+        self._send_2d_code_data(six.int2byte(69), cn, six.int2byte(ec))
+        self._send_2d_code(cn, data)
+
+    def maxicode(
+        self,
+        content: Union[str, bytes],
+        mode: int = MAXICODE_MODE_4,
+        native: Union[bool, Literal["auto"]] = True,
+    ) -> None:
+        """Print MaxiCode.
+
+        MaxiCodes have a fixed size and can only be rendered natively.
+        The printer database doesn't tell which printers support MaxiCodes, so the
+        capability can't be detected: with `native="auto"` a custom profile has to have
+        the feature `maxiCode`.
+
+        :param content: data to encode, str is encoded as UTF-8
+        :param mode: MAXICODE_MODE_2 to MAXICODE_MODE_6
+        :param native: True to render the code on the printer (Default), "auto" to decide by the profile
+        :raises: :py:exc:`ValueError` for invalid parameters,
+            :py:exc:`~escpos.exceptions.BarcodeTypeError` if the code can't be rendered
+        """
+        if not MAXICODE_MODE_2 <= mode <= MAXICODE_MODE_6:
+            raise ValueError("Invalid mode (must be 2-6)")
+        data = self._2d_code_content(content)
+        if not self._2d_code_native("maxiCode", native):
+            raise BarcodeTypeError(
+                "MaxiCodes can only be rendered natively, the profile lacks maxiCode"
+            )
+
+        cn = CODE2D_MAXICODE
+        self._send_2d_code_data(six.int2byte(65), cn, six.int2byte(48 + mode))
+        self._send_2d_code(cn, data)
+
+    def _2d_code_native(
+        self, feature: str, native: Union[bool, Literal["auto"]]
+    ) -> bool:
+        """Decide whether a 2D code is rendered natively by the printer.
+
+        :param feature: feature of the profile that indicates native support
+        :param native: True, False or "auto" to decide by the profile
+        """
+        if native == "auto":
+            return bool(self.profile.supports(feature))
+        return bool(native)
+
+    @staticmethod
+    def _2d_code_content(content: Union[str, bytes]) -> bytes:
+        """Encode the content of a 2D code, empty content is refused."""
+        data = content.encode("utf-8") if isinstance(content, str) else bytes(content)
+        if not data:
+            raise BarcodeCodeError("Content of 2D code must not be empty")
+        return data
+
+    def _send_2d_code(self, cn: bytes, data: bytes) -> None:
+        """Store the data of a 2D code in the symbol storage area and print it.
+
+        :param cn: Output code type.
+        :param data: Data of the code.
+        """
+        self._send_2d_code_data(six.int2byte(80), cn, data, b"0")
         self._send_2d_code_data(six.int2byte(81), cn, b"", b"0")
 
     def _send_2d_code_data(self, fn, cn, data, m=b"") -> None:
@@ -503,21 +1001,7 @@ class Escpos(object, metaclass=ABCMeta):
 
     def _dpi(self) -> int:
         """Printer's DPI resolution."""
-        try:
-            dpi = int(self.profile.profile_data["media"]["dpi"])
-        except (KeyError, TypeError, ValueError):
-            # Calculate the printer's DPI from the width info of the profile.
-            try:
-                px = self.profile.profile_data["media"]["width"]["pixels"]
-                mm = self.profile.profile_data["media"]["width"]["mm"]
-                mm -= 10  # paper width minus margin =~ printable area
-                dpi = int(px / (mm / 25.4))
-            except (KeyError, TypeError, ZeroDivisionError):
-                # Value on error.
-                dpi = 180
-                print(f"No printer's DPI info was found: Defaulting to {dpi}.")
-            self.profile.profile_data["media"]["dpi"] = dpi
-        return dpi
+        return self.profile.info.dpi
 
     def barcode(
         self,
@@ -556,8 +1040,7 @@ class Escpos(object, metaclass=ABCMeta):
         :param width: barcode module width (in printer dots), has to be between 2 and 6.
             *default*: 3
 
-        :param pos: text position (ABOVE, BELOW, BOTH, OFF) relative to the barcode
-            (ignored in software renderer).
+        :param pos: text position (ABOVE, BELOW, BOTH, OFF) relative to the barcode.
             *default*: BELOW
 
         :param font: select font A or B (ignored in software renderer).
@@ -585,11 +1068,10 @@ class Escpos(object, metaclass=ABCMeta):
               - Software:
                 `Python barcode documentation <https://python-barcode.readthedocs.io/en/stable/supported-formats.html>`_
         """
-        hw_modes = ["barcodeA", "barcodeB"]
-        sw_modes = ["graphics", "bitImageColumn", "bitImageRaster"]
+        profile_info = self.profile.info
         capable = {
-            "hw": [mode for mode in hw_modes if self.profile.supports(mode)] or None,
-            "sw": [mode for mode in sw_modes if self.profile.supports(mode)] or None,
+            "hw": profile_info.barcode_hw_modes or None,
+            "sw": profile_info.barcode_sw_modes or None,
         }
         if (not capable["hw"] and not capable["sw"]) or (
             not capable["sw"] and force_software
@@ -603,7 +1085,7 @@ class Escpos(object, metaclass=ABCMeta):
         bc_alnum = "".join([char for char in bc.upper() if char.isalnum()])
         capable_bc = {
             "hw": HW_BARCODE_NAMES.get(bc_alnum),
-            "sw": SW_BARCODE_NAMES.get(bc_alnum),
+            "sw": _get_sw_barcode_names().get(bc_alnum),
         }
         if not any([*capable_bc.values()]):
             raise BarcodeTypeError(f"Not supported or wrong barcode name {bc}.")
@@ -627,8 +1109,7 @@ class Escpos(object, metaclass=ABCMeta):
                 impl=impl,
                 module_height=height * mmxpt,
                 module_width=width * mmxpt,
-                text_distance=3,  # TODO: _hw_barcode() size equivalence
-                font_size=9,  # TODO: _hw_barcode() size equivalence
+                pos=pos,
                 center=align_ct,
             )
             return
@@ -796,15 +1277,18 @@ class Escpos(object, metaclass=ABCMeta):
         impl: str = "bitImageColumn",
         module_height: Union[int, float] = 5,
         module_width: Union[int, float] = 0.2,
-        text_distance: Union[int, float] = 5,
-        font_size: int = 10,
+        text_distance: Optional[Union[int, float]] = None,
+        font_size: Optional[int] = None,
         center: bool = True,
+        pos: str = "BELOW",
     ):
         """Print Barcode.
 
-        This method allows to print barcodes. The rendering of the barcode is done by
-        the `barcode` library and sent to the printer as image through one of the
-        printer's supported implementations: graphics, bitImageColumn or bitImageRaster.
+        This method allows to print barcodes. The barcode is encoded by
+        the `barcode` library, rasterized at the printer's resolution and sent to the printer
+        as image through one of the printer's supported implementations: graphics,
+        bitImageColumn or bitImageRaster.
+        The human-readable text is printed as text of the printer.
 
         :param barcode_type: barcode format, possible values are:
             * ean8
@@ -841,13 +1325,20 @@ class Escpos(object, metaclass=ABCMeta):
 
         :param module_width: barcode module width (in mm).
 
-        :param text_distance: distance from the barcode to the code text (in mm).
+        :param text_distance: deprecated, the text is printed by the printer
+            on its own line and this parameter has no effect.
 
-        :param font_size: font size of the code text (in dots).
+        :param font_size: deprecated, the text is printed in the current font
+            of the printer and this parameter has no effect.
 
-        :param center: center the barcode.
+        :param center: center the barcode and its text. The text is padded to
+            the columns of the printer, the alignment of the printer is not changed.
+
+        :param pos: text position (ABOVE, BELOW, BOTH, OFF) relative to the barcode.
         """
-        image_writer = ImageWriter()
+        import barcode
+
+        from .barcode_writer import RasterWriter
 
         # Check if barcode type exists
         if barcode_type not in barcode.PROVIDED_BARCODES:
@@ -855,24 +1346,52 @@ class Escpos(object, metaclass=ABCMeta):
                 f"Barcode type {barcode_type} not supported by software barcode renderer"
             )
 
-        # Render the barcode
+        pos = pos.upper()
+        if pos not in ("ABOVE", "BELOW", "BOTH", "OFF"):
+            raise ValueError(
+                f"Invalid text position {pos!r} (must be ABOVE, BELOW, BOTH or OFF)"
+            )
+
+        if text_distance is not None or font_size is not None:
+            warnings.warn(
+                "Parameters text_distance and font_size have no effect, the text of "
+                "software barcodes is printed by the printer. "
+                "They will be dropped in a future release.",
+                DeprecationWarning,
+            )
+
+        writer_options = {
+            "module_height": module_height,
+            "module_width": module_width,
+            "quiet_zone": 0,  # horizontal padding
+            "dpi": self._dpi(),  # Raster has to match the printer's dpi
+        }
+
+        # Validates the data, the text is printed by the printer
+        raster_writer = RasterWriter()
         barcode_class = barcode.get_barcode_class(barcode_type)
-        my_code = barcode_class(data, writer=image_writer)
-
-        my_code.render(
-            writer_options={
-                "module_height": module_height,
-                "module_width": module_width,
-                "quiet_zone": 0,  # horizontal padding
-                "text_distance": text_distance,
-                "font_size": font_size,
-                "dpi": self._dpi(),  # Image dpi has to match the printer's dpi
-            }
-        )
+        my_code = barcode_class(data, writer=raster_writer)
+        human_text = my_code.get_fullcode()
 
-        # Retrieve the Pillow image and print it
-        image = my_code.writer._image
-        self.image(image, impl=impl, center=center)
+        def render_barcode():
+            return my_code.render(writer_options=writer_options)
+
+        if center and pos in ("ABOVE", "BELOW", "BOTH"):
+            # pad the text instead of changing the alignment of the printer
+            try:
+                human_text = human_text.center(self.profile.get_columns("a")).rstrip()
+            except (NotSupported, KeyError):
+                pass
+        if pos in ("ABOVE", "BOTH"):
+            self.textln(human_text)
+        self._image_cached(
+            ("barcode", barcode_type, data, *sorted(writer_options.items())),
+            render_barcode,
+            impl=impl,
+            center=center,
+        )
+        if pos in ("BELOW", "BOTH"):
+            self.textln(human_text)
 
     def text(self, txt: str) -> None:
         """Print alpha-numeric text.
@@ -896,6 +1415,25 @@ class Escpos(object, metaclass=ABCMeta):
         """
         self.text(f"{txt}\n")
 
+    def write_stream(self, chunks: Iterable[str]) -> None:
+        """Print text that is produced in chunks, e.g. by a generator.
+
+        Each chunk is encoded and sent to the printer as soon as it arrives,
+        so that long texts are printed in constant memory.
+        The code page is kept across the chunks like for consecutive calls of :py:meth:`text`.
+
+        :param chunks: chunks of text to be printed
+        :raises: :py:exc:`~escpos.exceptions.TextError`
+        """
+        encoder = IncrementalEncoder(self.magic)
+        for chunk in chunks:
+            data = encoder.encode(str(chunk))
+            if data:
+                self._raw(data)
+        data = encoder.encode("", final=True)
+        if data:
+            self._raw(data)
+
     def ln(self, count: int = 1) -> None:
         """Print a newline or more.
 
@@ -907,7 +1445,7 @@ class Escpos(object, metaclass=ABCMeta):
         if count > 0:
             self.text("\n" * count)
 
-    def block_text(self, txt, font="0", columns=None) -> None:
+    def block_text(self, txt, font="0", columns=None, justify: bool = False) -> None:
         """Print text wrapped to specific columns.
 
         Text has to be encoded in Unicode.
@@ -915,24 +1453,47 @@ class Escpos(object, metaclass=ABCMeta):
         :param txt: text to be printed
         :param font: font to be used, can be :code:`a` or :code:`b`
         :param columns: amount of columns
+        :param justify: justify the text on both sides, except for the last line
+            and lines with a single word
         :return: None
         """
         col_count = self.profile.get_columns(font) if columns is None else columns
-        self.text(textwrap.fill(txt, col_count))
+        if not justify:
+            self.text(textwrap.fill(txt, col_count))
+            return
+        lines = textwrap.wrap(txt, col_count)
+        self.text(
+            "\n".join(
+                [
+                    self._justify(line, col_count) if " " in line else line
+                    for line in lines[:-1]
+                ]
+                + lines[-1:]
+            )
+        )
 
     @staticmethod
     def _justify(txt: str, width: int) -> str:
         """Justify-text on left AND right sides by padding spaces.
 
-        code by: Georgina Skibinski https://stackoverflow.com/a/66087666
+        The missing spaces are spread over the runs of whitespace, the first runs
+        get one more space if they can't be spread evenly.
+        Text without whitespace is aligned to the right.
+
+        based on code by: Georgina Skibinski https://stackoverflow.com/a/66087666
         suggested by agordon @https://github.com/python-escpos/python-escpos/pull/652
         """
-        prev_txt = txt
-        while (length := width - len(txt)) > 0:
-            txt = re.sub(r"(\s+)", r"\1 ", txt, count=length)
-            if txt == prev_txt:
-                break
-        return txt.rjust(width)
+        parts = re.split(r"(\s+)", txt)
+        gaps = parts[1::2]
+        missing = width - len(txt)
+        if missing <= 0 or not gaps:
+            return txt.rjust(width)
+        spaces, extra = divmod(missing, len(gaps))
+        parts[1::2] = [
+            f"{gap}{' ' * (spaces + 1 if i < extra else spaces)}"
+            for i, gap in enumerate(gaps)
+        ]
+        return "".join(parts)
 
     def _padding(
         self,
@@ -1012,43 +1573,159 @@ class Escpos(object, metaclass=ABCMeta):
             self._padding(text, widths[i], align[i]) for i, text in enumerate(text_list)
         ]
 
-    def software_columns(
+    @staticmethod
+    def _text_width(text: str) -> int:
+        """Return the number of columns a text takes up.
+
+        Wide East Asian characters take up two columns, combining characters none.
+        """
+        if text.isascii():
+            return len(text)
+        return sum(
+            0 if combining(char) else 2 if east_asian_width(char) in "WF" else 1
+            for char in text
+        )
+
+    @staticmethod
+    def _has_wide_chars(text: str) -> bool:
+        """Return whether the text contains wide East Asian characters."""
+        return not text.isascii() and any(
+            east_asian_width(char) in "WF" for char in text
+        )
+
+    def _wrap_cell(self, text: str, width: int) -> List[str]:
+        """Wrap the text of a table cell into lines of a maximum width.
+
+        Text is wrapped and truncated like in :py:meth:`_rearrange_into_cols`.
+        Text with wide East Asian characters is wrapped by the columns its characters
+        take up instead, words that are too long are broken, as there are no spaces
+        in Chinese and Japanese text.
+        """
+        if not self._has_wide_chars(text):
+            return [
+                self._truncate(line, width)
+                for line in textwrap.wrap(text, width, break_long_words=False)
+            ]
+        lines = []
+        line = ""
+        line_width = 0
+        for word in text.split():
+            word_width = self._text_width(word)
+            if line and line_width + 1 + word_width <= width:
+                line = f"{line} {word}"
+                line_width += 1 + word_width
+                continue
+            if line:
+                lines.append(line)
+                line = ""
+                line_width = 0
+            for char in word:
+                char_width = self._text_width(char)
+                if line and line_width + char_width > width:
+                    lines.append(line)
+                    line = ""
+                    line_width = 0
+                line += char
+                line_width += char_width
+        if line:
+            lines.append(line)
+        return lines
+
+    def _pad_cell(self, text: str, width: int, align: Alignment) -> str:
+        """Pad the text of a table cell to the number of columns `width`."""
+        if not self._has_wide_chars(text):
+            return self._padding(text, width, align)
+        return self._padding(text, width - (self._text_width(text) - len(text)), align)
+
+    def table(
         self,
-        text_list: list,
+        rows: Sequence[Sequence[str]],
         widths: Union[list[int], int],
         align: Union[list[Alignment], Alignment],
     ) -> None:
-        """Print a list of strings arranged horizontally in columns.
+        """Print rows of strings arranged horizontally in columns.
 
-        :param text_list: list of strings, each item in the list will be printed as a column.
+        Like :py:meth:`software_columns` for all rows of a table at once:
+        the geometry of the columns is computed once and the whole table is sent
+        to the printer with a single write.
+        Wide East Asian characters are counted as two columns.
+
+        :param rows: list of rows, each row is a list of strings, one for each column.
+            Rows with fewer strings are filled up with empty columns.
 
         :param widths: width of each column by passing a list of widths,
             or a single total width to arrange columns of the same size.
-            If the list of width items is shorter than the list of strings then
-            the last width of the list will be applied till the last string (column).
+            If the list of width items is shorter than the number of columns then
+            the last width of the list will be applied till the last column.
 
         :param align: alignment of the text into each column by passing a list of alignments,
             or a single alignment for all the columns.
-            If the list of alignment items is shorter than the list of strings then
-            the last alignment of the list will be applied till the last string (column).
+            If the list of alignment items is shorter than the number of columns then
+            the last alignment of the list will be applied till the last column.
         """
-        if not all([text_list, widths, align]):
+        if not all([widths, align]):
             raise TypeError("Value can't be of type None")
 
-        n_cols = len(text_list)
+        n_cols = max((len(row) for row in rows), default=0)
+        if not n_cols:
+            return
 
         if isinstance(widths, int):
             widths = [round(widths / n_cols)]
         widths = list(self._repeat_last(widths, max_iterations=n_cols))
+        if not all(isinstance(width, int) for width in widths):
+            raise TypeError("Widths have to be integers")
 
         if isinstance(align, str):
             align = [align]
         align = list(self._repeat_last(align, max_iterations=n_cols))
 
-        columns = self._rearrange_into_cols(text_list, widths)
-        for row in columns:
-            padded = self._add_padding_into_cols(row, widths, align)
-            self.textln("".join(padded))
+        columns = list(zip(widths, align))
+        empty_cells = [
+            self._padding("", width, alignment) for width, alignment in columns
+        ]
+        lines = []
+        for row in rows:
+            wrapped = [
+                self._wrap_cell(str(text), width) for text, width in zip(row, widths)
+            ]
+            for cells in zip_longest(*wrapped):
+                lines.append(
+                    "".join(
+                        empty_cell if cell is None else self._pad_cell(cell, *column)
+                        for cell, column, empty_cell in zip_longest(
+                            cells, columns, empty_cells
+                        )
+                    )
+                )
+        self.text("".join(f"{line}\n" for line in lines))
+
+    def software_columns(
+        self,
+        text_list: list,
+        widths: Union[list[int], int],
+        align: Union[list[Alignment], Alignment],
+    ) -> None:
+        """Print a list of strings arranged horizontally in columns.
+
+        To print several rows, use :py:meth:`table`.
+
+        :param text_list: list of strings, each item in the list will be printed as a column.
+
+        :param widths: width of each column by passing a list of widths,
+            or a single total width to arrange columns of the same size.
+            If the list of width items is shorter than the list of strings then
+            the last width of the list will be applied till the last string (column).
+
+        :param align: alignment of the text into each column by passing a list of alignments,
+            or a single alignment for all the columns.
+            If the list of alignment items is shorter than the list of strings then
+            the last alignment of the list will be applied till the last string (column).
+        """
+        if not all([text_list, widths, align]):
+            raise TypeError("Value can't be of type None")
+
+        self.table([text_list], widths, align)
 
     def set(
         self,
@@ -1335,6 +2012,11 @@ class Escpos(object, metaclass=ABCMeta):
         """
         if hw.upper() == "INIT":
             self._raw(HW_INIT)
+            # the printer is back to its default code page and out of kanji mode
+            forced_encoding = self.magic.encoding if self.magic.disabled else None
+            self.magic.reset()
+            if forced_encoding:
+                self.magic.force_encoding(forced_encoding)
         elif hw.upper() == "SELECT":
             self._raw(HW_SELECT)
         elif hw.upper() == "RESET":
@@ -10,10 +10,104 @@ This module contains the image format handler :py:class:`EscposImage`.
 
 
 import math
-from typing import Iterator, Union
+import mmap
+import os
+import re
+import types
+from typing import BinaryIO, Iterator, List, Optional, Sequence, Tuple, Union
 
 from PIL import Image, ImageOps
 
+np: Optional[types.ModuleType]
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+#: header of a binary portable bitmap (PBM, P4): magic number, width and height,
+#: separated by whitespace or comments and followed by a single whitespace
+PBM_HEADER = re.compile(
+    rb"P4(?:\s+|#[^\r\n]*[\r\n])+(\d+)(?:\s+|#[^\r\n]*[\r\n])+(\d+)\s"
+)
+
+
+def _map_pbm(
+    filename: Union[str, os.PathLike]
+) -> Optional[Tuple[mmap.mmap, memoryview, int, int]]:
+    """Map the raster data of a binary PBM file into memory.
+
+    The rows of a PBM (P4) file are packed with 1 bit per pixel, black as 1
+    and padded to full bytes, which is exactly the raster format of ESC/POS.
+
+    :param filename: file to map
+    :return: the mapping, a view on its raster data, width and height,
+        or None if the file is no binary PBM
+    """
+    with open(filename, "rb") as pbm_file:
+        if pbm_file.read(2) != b"P4":
+            return None
+        mapped = mmap.mmap(pbm_file.fileno(), 0, access=mmap.ACCESS_READ)
+    header = PBM_HEADER.match(mapped)
+    if not header:
+        mapped.close()
+        raise ValueError(f"Invalid PBM header in {filename}")
+    width, height = int(header.group(1)), int(header.group(2))
+    expected = ((width + 7) >> 3) * height
+    if len(mapped) - header.end() < expected:
+        mapped.close()
+        raise ValueError(
+            f"Raster data of {width}x{height} pixels in {filename} has to be "
+            f"{expected} bytes long, but is {len(mapped) - header.end()} bytes long"
+        )
+    raster = memoryview(mapped)[header.end() : header.end() + expected]
+    return mapped, raster, width, height
+
+
+def _as_raster(data, width: int, height: int) -> memoryview:
+    """Check a buffer of packed 1-bpp raster data and return a flat view on it.
+
+    :param data: bytes-like object, e.g. bytes, memoryview or a NumPy array of uint8
+    :param width: width of the raster in pixels
+    :param height: height of the raster in pixels
+    """
+    raster = memoryview(data)
+    if not raster.c_contiguous:
+        raise ValueError("Raster data has to be C-contiguous")
+    raster = raster.cast("B")
+    expected = ((width + 7) >> 3) * height
+    if raster.nbytes != expected:
+        raise ValueError(
+            f"Raster data of {width}x{height} pixels has to be {expected} bytes long, "
+            f"but is {raster.nbytes} bytes long"
+        )
+    return raster
+
+
+def _pack_matrix(matrix: Sequence[Sequence[bool]], scale: int) -> bytes:
+    """Pack a matrix of modules into 1-bpp raster data.
+
+    Each module is scaled to `scale` x `scale` pixels, set modules are printed black.
+    NumPy is used if it is installed.
+
+    :param matrix: rows of modules, e.g. the matrix of a QR code
+    :param scale: width and height of a module in pixels
+    :return: raster data with rows padded to full bytes
+    """
+    if np is not None:
+        modules = np.asarray(matrix, dtype=bool)
+        pixels = modules.repeat(scale, axis=0).repeat(scale, axis=1)
+        return np.packbits(pixels, axis=1).tobytes()
+
+    width = len(matrix[0]) * scale if matrix else 0
+    row_bytes = (width + 7) >> 3
+    padding = "0" * (row_bytes * 8 - width)
+    on, off = "1" * scale, "0" * scale
+    rows = []
+    for row in matrix:
+        bits = "".join(on if module else off for module in row) + padding
+        rows.append(int(bits, 2).to_bytes(row_bytes, "big") * scale)
+    return b"".join(rows)
+
 
 class EscposImage:
     """
@@ -21,24 +115,133 @@ class EscposImage:
 
     The class is designed to efficiently delegate image processing to
     PIL, rather than spend CPU cycles looping over pixels.
+
+    Images that are already in the raster format of the printer, either as a buffer
+    of packed 1-bpp rows or as binary PBM (P4) file, are passed through without
+    any conversion.
+
+    Other images are converted lazily: the dimensions are read from the header of
+    the image, the conversion only takes place once an ESC/POS format is requested.
+
+    A PBM file stays mapped into memory until :py:meth:`close` is called, the image
+    can be used as context manager for this.
     """
 
-    def __init__(self, img_source: Union[Image.Image, str]) -> None:
+    _size: Tuple[int, int]
+
+    def __init__(
+        self,
+        img_source: Union[
+            Image.Image, "EscposImage", str, os.PathLike, BinaryIO, bytes, memoryview
+        ],
+        width: Optional[int] = None,
+        height: Optional[int] = None,
+    ) -> None:
         """Load in an image.
 
-        :param img_source: PIL.Image, or filename to load one from.
+        Only the header of an image file is read here.
+
+        :param img_source: PIL.Image, filename or file object to load one from,
+            or a buffer (bytes, memoryview, NumPy array) with packed 1-bpp raster data.
+            The rows of the raster data are padded to full bytes and set bits are printed black.
+            An :py:class:`EscposImage` is shared, not copied.
+        :param width: width in pixels of the raster data
+        :param height: height in pixels of the raster data
         """
-        if isinstance(img_source, Image.Image):
-            img_original = img_source
+        self._raster: Optional[memoryview] = None
+        # the mapped PBM file, only set on the image that mapped it
+        self._mapping: Optional[mmap.mmap] = None
+        self._im: Optional[Image.Image] = None
+        # the original image is kept until it has been converted
+        self.img_original: Optional[Image.Image] = None
+
+        if isinstance(img_source, EscposImage):
+            self._raster = img_source._raster
+            self._im = img_source._im
+            self.img_original = img_source.img_original
+            self._size = img_source._size
+        elif isinstance(img_source, Image.Image):
+            self.img_original = img_source
+            self._size = img_source.size
+        elif width is not None or height is not None:
+            if width is None or height is None:
+                raise ValueError("Width and height are required for raster data")
+            self._raster = _as_raster(img_source, width, height)
+            self._size = (width, height)
         else:
-            img_original = Image.open(img_source)
+            if isinstance(img_source, (str, os.PathLike)):
+                pbm = _map_pbm(img_source)
+                if pbm:
+                    self._mapping, self._raster, width, height = pbm
+                    self._size = (width, height)
+                    return
+            # PIL only reads the header of the file at this point
+            self.img_original = Image.open(img_source)  # type: ignore [arg-type]
+            self._size = self.img_original.size
+
+    @classmethod
+    def from_matrix(
+        cls, matrix: Sequence[Sequence[bool]], scale: int = 1
+    ) -> "EscposImage":
+        """Create an image from a matrix of modules, e.g. of a QR code.
 
-        # store image for eventual further processing (splitting)
-        self.img_original = img_original
+        The modules are packed straight into raster data, without drawing an image.
 
+        :param matrix: rows of modules of equal length, set modules are printed black
+        :param scale: width and height of a module in pixels
+        """
+        if scale < 1:
+            raise ValueError("Scale must be at least 1")
+        width = len(matrix[0]) * scale if matrix else 0
+        return cls(_pack_matrix(matrix, scale), width, len(matrix) * scale)
+
+    @classmethod
+    def _from_converted(cls, im: Image.Image) -> "EscposImage":
+        """Create an instance from an image that has already been converted to ESC/POS."""
+        escpos_image = cls.__new__(cls)
+        escpos_image._raster = None
+        escpos_image._mapping = None
+        escpos_image._im = im
+        escpos_image.img_original = None
+        escpos_image._size = im.size
+        return escpos_image
+
+    def close(self) -> None:
+        """Unmap the PBM file the image has been loaded from.
+
+        The image can't be used anymore afterwards. Copies and fragments of the
+        image keep the file mapped until they are gone.
+        """
+        if self._mapping is None:
+            return
+        mapping, self._mapping, self._raster = self._mapping, None, None
+        try:
+            mapping.close()
+        except BufferError:
+            # still exported to copies or fragments, unmapped with the last of them
+            pass
+
+    def __enter__(self) -> "EscposImage":
+        """Use the image as context manager, see :py:meth:`close`."""
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Close the image."""
+        self.close()
+
+    def _get_im(self) -> Image.Image:
+        """Return the converted image, converting it on first use."""
+        if self._im is not None:
+            return self._im
+        if self._raster is not None:
+            self._im = Image.frombytes("1", self._size, self._raster)
+            return self._im
+
+        if self.img_original is None:
+            raise ValueError("The image has been closed")
         # Convert to white RGB background, paste over white background
         # to strip alpha.
-        img_original = img_original.convert("RGBA")
+        img_original = self.img_original.convert("RGBA")
         im = Image.new("RGB", img_original.size, (255, 255, 255))
         im.paste(img_original, mask=img_original.split()[3])
         # Convert down to greyscale
@@ -47,11 +250,19 @@ class EscposImage:
         im = ImageOps.invert(im)
         # Pure black and white
         self._im = im.convert("1")
+        # the original is not needed anymore, don't keep it in memory
+        self.img_original = None
+        return self._im
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        """Return width and height of image in pixels."""
+        return self._size
 
     @property
     def width(self) -> int:
         """Return width of image in pixels."""
-        width_pixels, _ = self._im.size
+        width_pixels, _ = self.size
         return width_pixels
 
     @property
@@ -62,7 +273,7 @@ class EscposImage:
     @property
     def height(self) -> int:
         """Height of image in pixels."""
-        _, height_pixels = self._im.size
+        _, height_pixels = self.size
         return height_pixels
 
     def to_column_format(self, high_density_vertical: bool = True) -> Iterator[bytes]:
@@ -70,7 +281,7 @@ class EscposImage:
 
         :param high_density_vertical: Printed line height in dots
         """
-        im = self._im.transpose(Image.ROTATE_270).transpose(Image.FLIP_LEFT_RIGHT)
+        im = self._get_im().transpose(Image.ROTATE_270).transpose(Image.FLIP_LEFT_RIGHT)
         line_height = 24 if high_density_vertical else 8
         width_pixels, height_pixels = im.size
         top = 0
@@ -82,15 +293,23 @@ class EscposImage:
             yield (im_bytes)
             left += line_height
 
-    def to_raster_format(self) -> bytes:
-        """Convert image to raster-format binary."""
-        return self._im.tobytes()
+    def to_raster_format(self) -> Union[bytes, memoryview]:
+        """Convert image to raster-format binary.
+
+        Raster data that has been passed in is returned as is, without a copy.
+        """
+        if self._raster is not None:
+            return self._raster
+        return self._get_im().tobytes()
 
-    def split(self, fragment_height: int):
+    def split(self, fragment_height: int) -> List["EscposImage"]:
         """Split an image into multiple fragments after fragment_height pixels.
 
+        Fragments of raster data are views on the rows, fragments of images that have
+        not been converted yet are converted on their own when they are used.
+
         :param fragment_height: height of fragment
-        :return: list of PIL objects
+        :return: list of :py:class:`EscposImage` objects
         """
         passes = int(math.ceil(self.height / fragment_height))
         fragments = []
@@ -99,8 +318,17 @@ class EscposImage:
             right = self.width
             upper = n * fragment_height
             lower = min((n + 1) * fragment_height, self.height)
+            if self._raster is not None:
+                # slice the rows out of the raster data, no copy required
+                row_bytes = self.width_bytes
+                raster = self._raster[upper * row_bytes : lower * row_bytes]
+                fragments.append(EscposImage(raster, self.width, lower - upper))
+                continue
             box = (left, upper, right, lower)
-            fragments.append(self.img_original.crop(box))
+            if self.img_original is not None:
+                fragments.append(EscposImage(self.img_original.crop(box)))
+            else:
+                fragments.append(EscposImage._from_converted(self._get_im().crop(box)))
         return fragments
 
     def center(self, max_width: int) -> None:
@@ -109,12 +337,14 @@ class EscposImage:
         :param: Maximum width in order to deduce x offset for centering
         :return: None
         """
-        old_width, height = self._im.size
+        old_width, height = self.size
         new_size = (max_width, height)
 
         new_im = Image.new("1", new_size)
         paste_x = int((max_width - old_width) / 2)
 
-        new_im.paste(self._im, (paste_x, 0))
+        new_im.paste(self._get_im(), (paste_x, 0))
 
         self._im = new_im
+        self._raster = None
+        self._size = new_im.size
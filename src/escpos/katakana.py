@@ -1,9 +1,14 @@
 #  -*- coding: utf-8 -*-
 """Helpers to encode Japanese characters.
 
-I doubt that this currently works correctly.
+Full-width katakana and hiragana are converted to half-width katakana with `jaconv`,
+if it is installed. Half-width katakana are part of the KATAKANA and CP932 code pages,
+:py:class:`~escpos.magicencode.MagicEncode` uses :py:func:`to_halfwidth_katakana`
+to print Japanese text with them.
 """
 
+import codecs
+import re
 import types
 import typing
 
@@ -13,25 +18,29 @@ try:
 except ImportError:
     jaconv = None
 
+#: full-width katakana and hiragana
+FULLWIDTH_KANA = re.compile("[\u3041-\u30ff]")
+
+
+def to_halfwidth_katakana(text: str) -> str:
+    """Convert the hiragana and full-width katakana in a text to half-width katakana.
+
+    The text is returned unchanged if `jaconv` is not installed.
+    A character may be converted into multiple characters, e.g. voiced sound marks.
+    """
+    if not jaconv or not FULLWIDTH_KANA.search(text):
+        return text
+    return jaconv.z2h(jaconv.hira2kata(text), kana=True, ascii=False, digit=False)
+
 
 def encode_katakana(text: str) -> bytes:
-    """I don't think this quite works yet."""
-    encoded = []
-    for char in text:
-        if jaconv:
-            # try to convert japanese text to half-katakanas
-            char = jaconv.z2h(jaconv.hira2kata(char))
-            # TODO: "the conversion may result in multiple characters"
-            # If that really can happen (I am not really shure), than the string would have to be split and every single
-            #  character has to passed through the following lines.
+    """Encode a text with the KATAKANA code page.
 
-        if char in TXT_ENC_KATAKANA_MAP:
-            encoded.append(TXT_ENC_KATAKANA_MAP[char])
-        else:
-            # TODO doesn't this discard all that is not in the map? Can we be sure that the input does contain only
-            # encodable characters? We could at least throw an exception if encoding is not possible.
-            pass
-    return b"".join(encoded)
+    Characters that are not part of the code page are dropped.
+    """
+    return codecs.charmap_encode(
+        to_halfwidth_katakana(text), "ignore", _KATAKANA_ENCODING_TABLE
+    )[0]
 
 
 TXT_ENC_KATAKANA_MAP = {
@@ -102,3 +111,10 @@ TXT_ENC_KATAKANA_MAP = {
     "ﾞ": b"\xde",
     "ﾟ": b"\xdf",
 }
+
+_KATAKANA_ENCODING_TABLE = codecs.charmap_build(
+    "".join(
+        {byte[0]: char for char, byte in TXT_ENC_KATAKANA_MAP.items()}.get(i, "\ufffe")
+        for i in range(256)
+    )
+)
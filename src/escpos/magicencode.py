@@ -13,14 +13,150 @@ The code is based on the encoding-code in py-xml-escpos by @fvdsn.
 """
 
 
+import codecs
 import re
+import threading
 from builtins import bytes
+from types import MappingProxyType
+from typing import Any, Dict, FrozenSet, List, Mapping, NamedTuple, Tuple
 
 import six
 
+from .cache import LRUCache
 from .codepages import CodePages
-from .constants import CODEPAGE_CHANGE
+from .constants import (
+    CODEPAGE_CHANGE,
+    KANJI_CODE_SYSTEM_SHIFT_JIS,
+    KANJI_MODE_OFF,
+    KANJI_MODE_ON,
+)
 from .exceptions import Error
+from .katakana import FULLWIDTH_KANA, to_halfwidth_katakana
+
+
+#: marks a byte of a decoding table that is not used for encoding, see :py:func:`codecs.charmap_build`
+_UNDEFINED = "\ufffe"
+
+#: compiled encoding tables, shared by all encoders
+_ENCODING_TABLES: Dict[str, Any] = {}
+
+#: patterns that match characters a code page can't encode, shared by all encoders
+_UNENCODABLE_PATTERNS: Dict[str, "re.Pattern[str]"] = {}
+
+#: multi-byte encodings of the kanji mode and their Python codecs
+MULTIBYTE_ENCODINGS = {
+    "GB18030": "gb18030",
+    "BIG5": "big5",
+    "SHIFT_JIS": "shift_jis",
+    "KSC5601": "euc_kr",
+}
+
+_CJK = "\u3000-\u303f\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uff01-\uff60\uffe0-\uffe6"
+_KANA = "\u3040-\u30ff"
+_HANGUL = "\u1100-\u11ff\u3130-\u318f\uac00-\ud7af"
+
+#: commands that select the kanji mode, with the kanji code system if it has to be selected
+_KANJI_MODE_SELECT = {
+    "SHIFT_JIS": KANJI_CODE_SYSTEM_SHIFT_JIS + KANJI_MODE_ON,
+}
+
+#: patterns that split off the runs of characters printed in kanji mode
+_MULTIBYTE_RUNS = {
+    "GB18030": re.compile(f"([{_CJK}]+)"),
+    "BIG5": re.compile(f"([{_CJK}]+)"),
+    "SHIFT_JIS": re.compile(f"([{_CJK}{_KANA}]+)"),
+    "KSC5601": re.compile(f"([{_CJK}{_HANGUL}]+)"),
+}
+
+#: character maps of the code pages, shared by all encoders
+_CHARACTER_MAPS: Dict[str, Mapping[str, int]] = {}
+
+#: encoding contexts, per code page map
+_ENCODING_CONTEXTS: Dict[Tuple, "EncodingContext"] = {}
+_ENCODING_CONTEXTS_LOCK = threading.Lock()
+
+
+def _get_character_map(encoding):
+    """Get the map of the characters 128-255 of a code page to their code points.
+
+    The map is built once only and shared by all encoders.
+
+    :param encoding: The name of the encoding.
+    """
+    try:
+        return _CHARACTER_MAPS[encoding]
+    except KeyError:
+        pass
+    codepage_char_list = Encoder._get_codepage_char_list(encoding)
+    character_map = MappingProxyType(
+        dict((utf8, i + 128) for (i, utf8) in enumerate(codepage_char_list))
+    )
+    _CHARACTER_MAPS[encoding] = character_map
+    return character_map
+
+
+class EncodingContext(NamedTuple):
+    """Immutable data about the code pages of a printer profile.
+
+    The context holds everything that can be derived from the code page map of a
+    profile: the slots of the code pages, their character maps and an index of the
+    code pages that can encode a character. It is built once only for each code page
+    map and shared by all :py:class:`Encoder` instances, and thus by all printer
+    objects with the same profile, see :py:func:`get_encoding_context`.
+    Only the encoders keep state, the code pages that have been used.
+    """
+
+    codepages: Mapping[str, Any]
+    slots: Mapping[str, Any]
+    available_encodings: FrozenSet[str]
+    character_maps: Mapping[str, Mapping[str, int]]
+    character_index: Mapping[str, Tuple[str, ...]]
+    ascii_encodings: Tuple[str, ...]
+
+    @classmethod
+    def from_codepage_map(cls, codepage_map) -> "EncodingContext":
+        """Build the context of a code page map.
+
+        :param codepage_map: code pages of the profile as ``{name: slot}`` dict
+        """
+        slots = dict(codepage_map)
+        character_maps = {}
+        character_index: Dict[str, List[str]] = {}
+        for encoding in sorted(slots, key=slots.__getitem__):
+            try:
+                character_map = _get_character_map(encoding)
+            except LookupError:
+                continue
+            character_maps[encoding] = character_map
+            for char in character_map:
+                if ord(char) >= 128:
+                    character_index.setdefault(char, []).append(encoding)
+        return cls(
+            codepages=MappingProxyType(dict(codepage_map)),
+            slots=MappingProxyType(slots),
+            available_encodings=frozenset(codepage_map),
+            character_maps=MappingProxyType(character_maps),
+            character_index=MappingProxyType(
+                {char: tuple(encodings) for char, encodings in character_index.items()}
+            ),
+            ascii_encodings=tuple(character_maps),
+        )
+
+
+def get_encoding_context(codepage_map) -> EncodingContext:
+    """Get the shared encoding context of a code page map.
+
+    :param codepage_map: code pages of the profile as ``{name: slot}`` dict
+    """
+    key = tuple(codepage_map.items())
+    try:
+        return _ENCODING_CONTEXTS[key]
+    except KeyError:
+        pass
+    with _ENCODING_CONTEXTS_LOCK:
+        if key not in _ENCODING_CONTEXTS:
+            _ENCODING_CONTEXTS[key] = EncodingContext.from_codepage_map(codepage_map)
+        return _ENCODING_CONTEXTS[key]
 
 
 class Encoder:
@@ -34,10 +170,15 @@ class Encoder:
     """
 
     def __init__(self, codepage_map):
-        """Initialize encoder."""
-        self.codepages = codepage_map
-        self.available_encodings = set(codepage_map.keys())
-        self.available_characters = {}
+        """Initialize encoder.
+
+        The data about the code pages is shared with all encoders of the same
+        code page map, see :py:class:`EncodingContext`.
+        """
+        self.context = get_encoding_context(codepage_map)
+        self.codepages = self.context.codepages
+        self.available_encodings = self.context.available_encodings
+        self.available_characters = self.context.character_maps
         self.used_encodings = set()
 
     def get_sequence(self, encoding):
@@ -71,23 +212,9 @@ class Encoder:
 
         :param encoding: The name of the encoding. This must appear in the code page list
         """
-        codepage = CodePages.get_encoding(encoding)
-        if "data" in codepage:
-            encodable_chars = list("".join(codepage["data"]))
-            assert len(encodable_chars) == 128
-            return encodable_chars
-        elif "python_encode" in codepage:
-            encodable_chars = [" "] * 128
-            for i in range(0, 128):
-                codepoint = i + 128
-                try:
-                    encodable_chars[i] = bytes([codepoint]).decode(
-                        codepage["python_encode"]
-                    )
-                except UnicodeDecodeError:
-                    # Non-encodable character, just skip it
-                    pass
-            return encodable_chars
+        encodable_chars = CodePages.get_characters(encoding)
+        if encodable_chars is not None:
+            return list(encodable_chars)
         raise LookupError(f"Can't find a known encoding for {encoding}")
 
     def _get_codepage_char_map(self, encoding):
@@ -100,15 +227,10 @@ class Encoder:
 
         :param encoding: The name of the encoding.
         """
-        # Skip things that were loaded previously
-        if encoding in self.available_characters:
+        try:
             return self.available_characters[encoding]
-        codepage_char_list = self._get_codepage_char_list(encoding)
-        codepage_char_map = dict(
-            (utf8, i + 128) for (i, utf8) in enumerate(codepage_char_list)
-        )
-        self.available_characters[encoding] = codepage_char_map
-        return codepage_char_map
+        except KeyError:
+            return _get_character_map(encoding)
 
     def can_encode(self, encoding, char):
         """Determine if a character is encodable in the given code page.
@@ -127,18 +249,54 @@ class Encoder:
         is_encodable = char in available_map
         return is_ascii or is_encodable
 
-    @staticmethod
-    def _encode_char(char, charmap, defaultchar):
-        """Encode a single character with the given encoding map.
+    def _get_unencodable_pattern(self, encoding):
+        """Get a pattern that matches the characters that can't be encoded in a code page.
 
-        :param char: char to encode
-        :param charmap: dictionary for mapping characters in this code page
+        The pattern is compiled once only and shared by all encoders.
+        It matches every character if the code page is unknown.
+
+        :param encoding: The name of the encoding.
         """
-        if ord(char) < 128:
-            return ord(char)
-        if char in charmap:
-            return charmap[char]
-        return ord(defaultchar)
+        try:
+            return _UNENCODABLE_PATTERNS[encoding]
+        except KeyError:
+            pass
+        try:
+            codepage_char_map = self._get_codepage_char_map(encoding)
+        except LookupError:
+            pattern = re.compile(r"[\s\S]")
+        else:
+            encodable = "".join(
+                re.escape(char) for char in codepage_char_map if ord(char) >= 128
+            )
+            pattern = re.compile(f"[^\\x00-\\x7f{encodable}]")
+        _UNENCODABLE_PATTERNS[encoding] = pattern
+        return pattern
+
+    @classmethod
+    def _get_encoding_table(cls, encoding):
+        """Get the compiled encoding table of a code page.
+
+        ASCII characters are encoded as themselves, characters 128-255 of the code page
+        as their position. Positions that hold ASCII characters are not used for encoding,
+        like in the character map.
+
+        The table is compiled once only with :py:func:`codecs.charmap_build` and shared
+        by all encoders, so that :py:func:`codecs.charmap_encode` encodes whole strings in C.
+
+        :param encoding: The name of the encoding.
+        """
+        try:
+            return _ENCODING_TABLES[encoding]
+        except KeyError:
+            pass
+        decoding_table = "".join(chr(i) for i in range(128)) + "".join(
+            _UNDEFINED if ord(char) < 128 else char
+            for char in cls._get_codepage_char_list(encoding)
+        )
+        encoding_table = codecs.charmap_build(decoding_table)
+        _ENCODING_TABLES[encoding] = encoding_table
+        return encoding_table
 
     def encode(self, text, encoding, defaultchar="?"):
         """Encode text under the given encoding.
@@ -147,16 +305,43 @@ class Encoder:
         :param encoding: Encoding name to use (must be defined in capabilities)
         :param defaultchar: Fallback for non-encodable characters
         """
-        codepage_char_map = self._get_codepage_char_map(encoding)
-        output_bytes = bytes(
-            [self._encode_char(char, codepage_char_map, defaultchar) for char in text]
-        )
-        return output_bytes
+        encoding_table = self._get_encoding_table(encoding)
+        output = []
+        while text:
+            try:
+                output.append(codecs.charmap_encode(text, "strict", encoding_table)[0])
+                break
+            except UnicodeEncodeError as error:
+                # encode the part before the non-encodable characters
+                output.append(
+                    codecs.charmap_encode(
+                        text[: error.start], "strict", encoding_table
+                    )[0]
+                )
+                output.append(bytes([ord(defaultchar)]) * (error.end - error.start))
+                text = text[error.end :]
+        return b"".join(output)
+
+    def _get_character_index(self):
+        """Get the index of the code pages that can encode a character.
+
+        Returns a dict that maps the characters 128-255 of all code pages to the names
+        of the code pages that can encode them, and the code pages that can
+        encode ASCII. The code pages are ordered by their slot.
+
+        The index is part of the shared :py:class:`EncodingContext`.
+        """
+        return self.context.character_index, self.context.ascii_encodings
+
+    def get_suitable_encodings(self, char):
+        """Return the code pages that can encode a character, ordered by their slot.
 
-    def __encoding_sort_func(self, item):
-        key, index = item
-        used = key in self.used_encodings
-        return (not used, index)
+        :param char: The character to encode.
+        """
+        character_index, ascii_encodings = self._get_character_index()
+        if ord(char) < 128:
+            return ascii_encodings
+        return character_index.get(char, ())
 
     def find_suitable_encoding(self, char):
         """Search in a specific order for a suitable encoding.
@@ -175,14 +360,21 @@ class Encoder:
            is missing or incomplete, we might increase our change
            that the code page we pick for this character is actually
            supported.
+
+        The candidates are looked up in an index of the code pages, see
+        :py:meth:`_get_character_index`.
         """
-        sorted_encodings = sorted(self.codepages.items(), key=self.__encoding_sort_func)
+        candidates = self.get_suitable_encodings(char)
+        if not candidates:
+            return None
 
-        for encoding, _ in sorted_encodings:
-            if self.can_encode(encoding, char):
-                # This encoding worked; at it to the set of used ones.
-                self.used_encodings.add(encoding)
-                return encoding
+        encoding = next(
+            (encoding for encoding in candidates if encoding in self.used_encodings),
+            candidates[0],
+        )
+        # This encoding worked; at it to the set of used ones.
+        self.used_encodings.add(encoding)
+        return encoding
 
 
 def split_writable_text(encoder, text, encoding):
@@ -194,12 +386,103 @@ def split_writable_text(encoder, text, encoding):
     if not encoding:
         return None, text
 
-    for idx, char in enumerate(text):
-        if encoder.can_encode(encoding, char):
-            continue
-        return text[:idx], text[idx:]
+    unencodable = encoder._get_unencodable_pattern(encoding).search(text)
+    if not unencodable:
+        return text, None
+    idx = unencodable.start()
+    return text[:idx], text[idx:]
+
+
+def segment_text(encoder, text, encoding, lookahead=256):
+    """Split up the text into runs with the least code page changes.
 
-    return text, None
+    The code pages are chosen by dynamic programming over the characters
+    that can't be encoded in every code page. Every character is one byte and every
+    code page change costs three bytes, so the output with the least code page
+    changes is the shortest. Between equally short choices, the code pages that
+    were used before and then those in lower slots are preferred, like in
+    :py:meth:`Encoder.find_suitable_encoding`.
+
+    The text is optimized in windows of `lookahead` of these characters, so that the
+    effort stays linear for long texts.
+
+    Characters that no code page can encode are left in the current run.
+    Returns a list of 2-tuples (encoding, run), the encoding of the first run
+    is `encoding` if it can encode the run.
+
+    :param encoder: the :py:class:`Encoder` to use
+    :param text: text to split up
+    :param encoding: code page that is currently selected, None if unknown
+    :param lookahead: number of characters to optimize together
+    """
+    _, ascii_encodings = encoder._get_character_index()
+
+    def rank(candidate):
+        if candidate is None:
+            return (True,)
+        return (
+            candidate not in encoder.used_encodings,
+            encoder.context.slots[candidate],
+        )
+
+    # positions of the characters that restrict the choice of the code page,
+    # ASCII only does so until a code page is selected that can encode it
+    initial_encoding = encoding
+    constraints = []
+    for position, char in enumerate(text):
+        if ord(char) >= 128 or (not constraints and encoding not in ascii_encodings):
+            candidates = encoder.get_suitable_encodings(char)
+            if candidates:
+                constraints.append((position, candidates))
+    if not constraints:
+        return [(encoding, text)] if text else []
+
+    assigned = []
+    for start in range(0, len(constraints), lookahead):
+        window = constraints[start : start + lookahead]
+        # costs: code page -> number of changes; choices: code page -> predecessor
+        costs = {encoding: 0}
+        choices = []
+        for _, candidates in window:
+            best = min(costs, key=lambda e: (costs[e], rank(e)))
+            new_costs = {}
+            new_choice = {}
+            for candidate in candidates:
+                if candidate in costs and costs[candidate] <= costs[best] + 1:
+                    new_costs[candidate] = costs[candidate]
+                    new_choice[candidate] = candidate
+                else:
+                    new_costs[candidate] = costs[best] + 1
+                    new_choice[candidate] = best
+            costs = new_costs
+            choices.append(new_choice)
+        last = min(costs, key=lambda e: (costs[e], rank(e)))
+        window_assigned = [last]
+        for choice in reversed(choices[1:]):
+            window_assigned.append(choice[window_assigned[-1]])
+        assigned.extend(reversed(window_assigned))
+        encoding = last
+
+    runs = []
+    run_start = 0
+    # change the code page right before the first character that requires it
+    run_encoding = (
+        initial_encoding if initial_encoding in ascii_encodings else assigned[0]
+    )
+    for (position, _), chosen in zip(constraints, assigned):
+        encoder.used_encodings.add(chosen)
+        if chosen != run_encoding:
+            if position > run_start:
+                runs.append((run_encoding, text[run_start:position]))
+            run_start = position
+            run_encoding = chosen
+    runs.append((run_encoding, text[run_start:]))
+    return runs
+
+
+def _encoded_size(value):
+    """Return the size of a cached encoded text."""
+    return len(value[0])
 
 
 class MagicEncode:
@@ -217,7 +500,17 @@ class MagicEncode:
     """
 
     def __init__(
-        self, driver, encoding=None, disabled=False, defaultsymbol="?", encoder=None
+        self,
+        driver,
+        encoding=None,
+        disabled=False,
+        defaultsymbol="?",
+        encoder=None,
+        minimize_switches=False,
+        lookahead=256,
+        cache_entries=0,
+        cache_size=64 * 1024,
+        multibyte_encoding=None,
     ):
         """Initialize magic encode.
 
@@ -229,6 +522,21 @@ class MagicEncode:
         :param disabled:
         :param defaultsymbol:
         :param encoder:
+        :param minimize_switches: Choose the code pages so that the least code page
+            changes are emitted, see :py:func:`segment_text`. By default the current
+            code page is kept until a character can't be encoded.
+        :param lookahead: number of characters that are optimized together
+            if `minimize_switches` is set
+        :param cache_entries: number of encoded texts to keep in a least recently used
+            cache, 0 disables the cache. Repeated texts like headers and column labels
+            are then encoded only once.
+        :param cache_size: maximum total size in bytes of the cached encoded texts
+        :param multibyte_encoding: encoding of the kanji mode of the printer,
+            one of :py:data:`MULTIBYTE_ENCODINGS`. CJK characters are printed in kanji mode
+            with this encoding. *Default*: the ``multiByteEncoding`` of the profile or GB18030,
+            an empty string disables the kanji mode. The printer database doesn't declare
+            the encoding, so set SHIFT_JIS for Japanese printers; the kanji code system is
+            then selected with FS C before the kanji mode is turned on.
         """
         if disabled and not encoding:
             raise Error("If you disable magic encode, you need to define an encoding!")
@@ -239,6 +547,41 @@ class MagicEncode:
         self.encoding = self.encoder.get_encoding_name(encoding) if encoding else None
         self.defaultsymbol = defaultsymbol
         self.disabled = disabled
+        self.minimize_switches = minimize_switches
+        self.lookahead = lookahead
+
+        if multibyte_encoding is None:
+            multibyte_encoding = driver.profile.profile_data.get(
+                "multiByteEncoding", "GB18030"
+            )
+        if multibyte_encoding and multibyte_encoding not in MULTIBYTE_ENCODINGS:
+            raise ValueError(
+                f'Multi-byte encoding "{multibyte_encoding}" is not supported. '
+                f'Valid encodings are: {",".join(MULTIBYTE_ENCODINGS)}'
+            )
+        self.multibyte_encoding = multibyte_encoding
+        #: whether the printer is in kanji mode, it is off after initialization
+        self.kanji_mode = False
+        # whether a code page of the profile has half-width katakana, checked on first use
+        self._halfwidth_katakana = None
+        #: cache of encoded texts, see :py:attr:`escpos.cache.LRUCache.statistics`
+        self.cache = (
+            LRUCache(cache_entries, cache_size, sizeof=_encoded_size)
+            if cache_entries
+            else None
+        )
+
+    def reset(self, encoding=None):
+        """Reset the tracked state of the printer, e.g. after it has been initialized.
+
+        Nothing is sent to the printer.
+
+        :param encoding: code page the printer is known to be in. If it is unknown,
+            the first character emitted will be a code page switch.
+        """
+        self.encoding = self.encoder.get_encoding_name(encoding) if encoding else None
+        self.kanji_mode = False
+        self.encoder.used_encodings.clear()
 
     def force_encoding(self, encoding):
         """Set a fixed encoding. The change is emitted right away.
@@ -253,57 +596,223 @@ class MagicEncode:
             self.disabled = True
 
     def write(self, text):
-        """Write the text, automatically switching encodings."""
-        if self.disabled:
-            self.write_with_encoding(self.encoding, text)
-            return
+        """Write the text, automatically switching encodings.
+
+        The text and the code page changes are sent to the printer at once.
+        """
+        data = self.encode(text)
+        if data:
+            self.driver._raw(data)
+
+    def encode(self, text):
+        """Encode the text, automatically switching encodings.
+
+        Returns the encoded text including the necessary code page changes
+        and updates the state as if it had been written.
+        """
+        if self.cache is None:
+            return self._encode(text)
+        return self._encode_cached(text)
+
+    def _encode_cached(self, text):
+        """Encode the text, using the cache.
+
+        The result depends on the text, the current code page and the code pages
+        that have been used before, it is cached together with the resulting state.
+        """
+        assert self.cache is not None
+        key = (
+            text,
+            self.encoding,
+            self.kanji_mode,
+            frozenset(self.encoder.used_encodings),
+            self.disabled,
+            self.minimize_switches,
+            self.lookahead,
+            self.defaultsymbol,
+        )
+        cached = self.cache.get(key)
+        if cached is not None:
+            data, self.encoding, self.kanji_mode, used_encodings = cached
+            self.encoder.used_encodings.update(used_encodings)
+            return data
+        data = self._encode(text)
+        self.cache.put(
+            key,
+            (
+                data,
+                self.encoding,
+                self.kanji_mode,
+                frozenset(self.encoder.used_encodings),
+            ),
+        )
+        return data
+
+    def _encode(self, text):
+        """Encode the text, automatically switching encodings.
 
-        if re.findall(r"[\u4e00-\u9fa5]", text):
-            self.driver._raw(text.encode("GB18030"))
-            return
+        Returns the encoded text including the necessary code page changes.
+        """
+        if self.disabled:
+            return self._encode_with_encoding(self.encoding, text)
+
+        if not self.multibyte_encoding:
+            return self._encode_single_byte(text)
+
+        # split up the text into runs for the code pages and for the kanji mode
+        runs = _MULTIBYTE_RUNS[self.multibyte_encoding].split(text)
+        if len(runs) == 1 and (not self.kanji_mode or text.isascii()):
+            return self._encode_single_byte(text)
+
+        output = []
+        for index, run in enumerate(runs):
+            if index % 2:
+                if not self.kanji_mode:
+                    output.append(
+                        _KANJI_MODE_SELECT.get(self.multibyte_encoding, KANJI_MODE_ON)
+                    )
+                    self.kanji_mode = True
+                output.append(
+                    run.encode(MULTIBYTE_ENCODINGS[self.multibyte_encoding], "replace")
+                )
+            elif run:
+                # ASCII is printed the same in kanji mode
+                if self.kanji_mode and not run.isascii():
+                    output.append(KANJI_MODE_OFF)
+                    self.kanji_mode = False
+                output.append(self._encode_single_byte(run))
+        return b"".join(output)
+
+    def _encode_single_byte(self, text):
+        """Encode the text with the code pages, automatically switching them.
+
+        Japanese kana are converted to half-width katakana if the profile has a code page for them.
+        """
+        if FULLWIDTH_KANA.search(text):
+            if self._halfwidth_katakana is None:
+                self._halfwidth_katakana = bool(
+                    self.encoder.get_suitable_encodings("\uff71")
+                )
+            if self._halfwidth_katakana:
+                text = to_halfwidth_katakana(text)
+        if self.minimize_switches:
+            # replace the characters that no code page can encode beforehand
+            text = "".join(
+                char
+                if self.encoder.get_suitable_encodings(char)
+                else self.defaultsymbol
+                for char in text
+            )
+            return b"".join(
+                self._encode_with_encoding(encoding, run)
+                for encoding, run in segment_text(
+                    self.encoder, text, self.encoding, self.lookahead
+                )
+            )
 
+        output = []
         # See how far we can go into the text with the current encoding
         to_write, text = split_writable_text(self.encoder, text, self.encoding)
         if to_write:
-            self.write_with_encoding(self.encoding, to_write)
+            output.append(self._encode_with_encoding(self.encoding, to_write))
 
         while text:
             # See if any of the code pages that the printer profile
             # supports can encode this character.
             encoding = self.encoder.find_suitable_encoding(text[0])
             if not encoding:
-                self._handle_character_failed(text[0])
+                output.append(self._handle_character_failed(text[0]))
                 text = text[1:]
                 continue
 
             # Write as much text as possible with the encoding found.
             to_write, text = split_writable_text(self.encoder, text, encoding)
             if to_write:
-                self.write_with_encoding(encoding, to_write)
+                output.append(self._encode_with_encoding(encoding, to_write))
+        return b"".join(output)
 
     def _handle_character_failed(self, char):
-        """Write a default symbol.
+        """Encode a default symbol.
 
         Called when no code page was found to render a character.
         """
-        # Writing the default symbol via write() allows us to avoid
+        # Encoding the default symbol via _encode() allows us to avoid
         # unnecesary code page switches.
-        self.write(self.defaultsymbol)
+        return self._encode(self.defaultsymbol)
 
     def write_with_encoding(self, encoding, text):
         """Write the text and inject necessary code page switches."""
+        data = self._encode_with_encoding(encoding, text)
+        if data:
+            self.driver._raw(data)
+
+    def _encode_with_encoding(self, encoding, text):
+        """Encode the text and inject necessary code page switches."""
         if text is not None and type(text) is not str:
             raise Error(
                 f"The supplied text has to be Unicode, but is of type {type(text)}."
             )
 
+        output = b""
+        # In kanji mode, code page changes and non-ASCII characters would be read
+        # as multi-byte data, leave it first.
+        if self.kanji_mode and (
+            encoding != self.encoding or (text and not text.isascii())
+        ):
+            output = KANJI_MODE_OFF
+            self.kanji_mode = False
+
         # We always know the current code page; if the new code page
         # is different, emit a change command.
         if encoding != self.encoding:
             self.encoding = encoding
-            self.driver._raw(
-                CODEPAGE_CHANGE + six.int2byte(self.encoder.get_sequence(encoding))
+            output += CODEPAGE_CHANGE + six.int2byte(
+                self.encoder.get_sequence(encoding)
             )
 
         if text:
-            self.driver._raw(self.encoder.encode(text, encoding))
+            output += self.encoder.encode(text, encoding)
+        return output
+
+
+class IncrementalEncoder(codecs.IncrementalEncoder):
+    """Encode text that arrives in chunks, automatically switching encodings.
+
+    Like :py:class:`codecs.IncrementalEncoder`, the encoder returns the bytes of each
+    chunk as soon as possible, so that long texts don't have to be kept in memory.
+    The code page and the kanji mode are carried from chunk to chunk by the
+    :py:class:`MagicEncode` instance. The last character of a chunk is held back
+    until the next chunk, in case that one starts with a combining character,
+    e.g. a voiced sound mark of kana or an accent. Whitespace isn't held back,
+    so that chunks that end with a space or a line break are sent right away.
+    """
+
+    def __init__(self, magic, errors="strict"):
+        """Initialize incremental encoder.
+
+        :param magic: the :py:class:`MagicEncode` instance of the printer
+        :param errors: not used, characters that can't be encoded are replaced
+            with the default symbol of `magic`
+        """
+        super().__init__(errors)
+        self.magic = magic
+        self._pending = ""
+
+    def encode(self, input, final=False):
+        """Encode a chunk of text.
+
+        :param input: chunk of text
+        :param final: whether this is the last chunk
+        :return: the encoded text including the necessary code page changes
+        """
+        text = self._pending + input
+        self._pending = ""
+        if not final and text and not text[-1].isspace():
+            text, self._pending = text[:-1], text[-1]
+        if not text:
+            return b""
+        return self.magic.encode(text)
+
+    def reset(self):
+        """Drop the held back character."""
+        self._pending = ""
@@ -1,14 +1,22 @@
 # -*- coding: utf-8 -*-
-"""printer implementations."""
+"""printer implementations.
 
-from .cups import CupsPrinter
-from .dummy import Dummy
-from .file import File
-from .lp import LP
-from .network import Network
-from .serial import Serial
-from .usb import Usb
-from .win32raw import Win32Raw
+The printer implementations are imported on first access, so that only the
+backend that is used, and its dependencies, is loaded.
+"""
+
+import importlib
+from typing import TYPE_CHECKING, Any, List
+
+if TYPE_CHECKING:
+    from .cups import CupsPrinter
+    from .dummy import Dummy
+    from .file import File
+    from .lp import LP
+    from .network import Network
+    from .serial import Serial
+    from .usb import Usb
+    from .win32raw import Win32Raw
 
 __all__ = [
     "Usb",
@@ -20,3 +28,30 @@ __all__ = [
     "CupsPrinter",
     "Win32Raw",
 ]
+
+#: modules of the printer implementations
+_BACKENDS = {
+    "Usb": "usb",
+    "File": "file",
+    "Network": "network",
+    "Serial": "serial",
+    "LP": "lp",
+    "Dummy": "dummy",
+    "CupsPrinter": "cups",
+    "Win32Raw": "win32raw",
+}
+
+
+def __getattr__(name: str) -> Any:
+    """Import a printer implementation on first access."""
+    if name not in _BACKENDS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module = importlib.import_module(f".{_BACKENDS[name]}", __name__)
+    printer_class = getattr(module, name)
+    globals()[name] = printer_class
+    return printer_class
+
+
+def __dir__() -> List[str]:
+    """List the printer implementations, also those that haven't been imported yet."""
+    return sorted(set(globals()) | set(__all__))
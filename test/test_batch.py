@@ -0,0 +1,67 @@
+#!/usr/bin/python
+"""tests for the batch rendering
+
+:author: python-escpos developers
+:organization: `python-escpos <https://github.com/python-escpos>`_
+:copyright: Copyright (c) 2026 `python-escpos <https://github.com/python-escpos>`_
+:license: MIT
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from escpos.batch import render, render_batch
+from escpos.printer import Dummy
+
+SPECS = [
+    ("qr", {"content": "1", "size": 1}),
+    ("image", {"img_source": "test/resources/black_white.png"}),
+    ("barcode", {"code": "1234567", "bc": "ean8", "force_software": True}),
+    ("qr", {"content": "LoremIpsum", "size": 2}),
+]
+
+
+def _render_sequential(spec) -> bytes:
+    """Render a spec the way a printer would do it directly."""
+    method, kwargs = spec
+    instance = Dummy(magic_encode_args={"encoding": "CP437"})
+    getattr(instance, method)(**kwargs)
+    return instance.output
+
+
+def test_render_batch_matches_sequential() -> None:
+    """test that the batch output equals the direct output in order"""
+    results = render_batch(SPECS, max_workers=2)
+    assert results == [_render_sequential(spec) for spec in SPECS]
+
+
+def test_render_batch_profile() -> None:
+    """test that the profile is used by the workers"""
+    spec = ("barcode", {"code": "1234567", "bc": "ean8", "force_software": True})
+    (result,) = render_batch([spec], profile="TM-T88V", max_workers=1)
+    assert result == render(spec, profile="TM-T88V")
+    assert result != render(spec, profile="TM-T20II")
+
+
+def test_render_no_codepage_change() -> None:
+    """test that rendered QR codes don't change the code page"""
+    assert b"\x1bt" not in render(("qr", {"content": "1"}))
+
+
+def test_render_batch_executor() -> None:
+    """test that a given executor is used for several batches and not shut down"""
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        first = render_batch(SPECS[:2], executor=executor)
+        second = render_batch(SPECS[2:], executor=executor)
+        assert executor.submit(len, "abc").result() == 3
+    assert first + second == [_render_sequential(spec) for spec in SPECS]
+
+
+def test_render_batch_empty() -> None:
+    assert render_batch([]) == []
+
+
+def test_render_batch_invalid_method() -> None:
+    with pytest.raises(ValueError):
+        render_batch([("text", {"txt": "Hello"})])
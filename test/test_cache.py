@@ -0,0 +1,109 @@
+#!/usr/bin/python
+"""tests for the render cache
+
+:author: python-escpos developers
+:organization: `python-escpos <https://github.com/python-escpos>`_
+:copyright: Copyright (c) 2026 `python-escpos <https://github.com/python-escpos>`_
+:license: MIT
+"""
+
+import mock
+import pytest
+
+from escpos.barcode_writer import RasterWriter
+from escpos.cache import LRUCache
+from escpos.printer import Dummy
+
+
+class TestLRUCache:
+    """
+    Tests the least recently used cache.
+    """
+
+    def test_get_put(self) -> None:
+        cache = LRUCache()
+        assert cache.get("a") is None
+        cache.put("a", [b"abc"])
+        assert cache.get("a") == [b"abc"]
+        assert "a" in cache
+        assert cache.statistics.hits == 1
+        assert cache.statistics.misses == 1
+        assert cache.statistics.hit_rate == 0.5
+        assert cache.statistics.size == 3
+
+    def test_max_entries(self) -> None:
+        cache = LRUCache(max_entries=2)
+        cache.put("a", [b"a"])
+        cache.put("b", [b"b"])
+        cache.get("a")
+        cache.put("c", [b"c"])
+        # b is the least recently used entry
+        assert "b" not in cache
+        assert "a" in cache
+        assert "c" in cache
+        assert cache.statistics.evictions == 1
+
+    def test_max_size(self) -> None:
+        cache = LRUCache(max_size=4)
+        cache.put("a", [b"ab"])
+        cache.put("b", [b"cd"])
+        cache.put("c", [b"e"])
+        assert "a" not in cache
+        assert cache.statistics.size == 3
+        # too large on its own
+        cache.put("d", [b"abcde"])
+        assert "d" not in cache
+        assert len(cache) == 2
+
+    def test_clear(self) -> None:
+        cache = LRUCache()
+        cache.put("a", [b"a"])
+        cache.get("a")
+        cache.clear()
+        assert len(cache) == 0
+        assert cache.statistics.hits == 0
+
+    def test_invalid_max_entries(self) -> None:
+        with pytest.raises(ValueError):
+            LRUCache(max_entries=0)
+
+
+class TestRenderCache:
+    """
+    Tests the render cache of the printer.
+    """
+
+    def test_qr(self) -> None:
+        uncached = Dummy()
+        uncached.qr("LoremIpsum", size=2)
+        cache = LRUCache()
+        for _ in range(3):
+            instance = Dummy()
+            instance.set_render_cache(cache)
+            instance.qr("LoremIpsum", size=2)
+            assert instance.output == uncached.output
+        assert cache.statistics.misses == 1
+        assert cache.statistics.hits == 2
+
+    def test_qr_parameters(self) -> None:
+        instance = Dummy()
+        instance.set_render_cache(LRUCache())
+        instance.qr("LoremIpsum", size=2)
+        instance.qr("LoremIpsum", size=3)
+        instance.qr("LoremIpsum", size=2, center=True)
+        assert instance.render_cache is not None
+        assert instance.render_cache.statistics.misses == 3
+
+    def test_barcode(self) -> None:
+        uncached = Dummy()
+        uncached.barcode("1234567", "ean8", force_software=True)
+        uncached.barcode("1234567", "ean8", force_software=True)
+        instance = Dummy()
+        instance.set_render_cache(LRUCache())
+        with mock.patch.object(
+            RasterWriter, "render", autospec=True, side_effect=RasterWriter.render
+        ) as render:
+            instance.barcode("1234567", "ean8", force_software=True)
+            instance.barcode("1234567", "ean8", force_software=True)
+            assert render.call_count == 1
+        assert instance.output == uncached.output
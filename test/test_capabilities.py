@@ -0,0 +1,105 @@
+#!/usr/bin/python
+"""tests for loading the capabilities database
+
+:author: python-escpos developers
+:organization: `python-escpos <https://github.com/python-escpos>`_
+:copyright: Copyright (c) 2026 `python-escpos <https://github.com/python-escpos>`_
+:license: MIT
+"""
+
+import json
+import os
+import pathlib
+import subprocess
+import sys
+
+import pytest
+
+import escpos.capabilities as capabilities
+
+DATABASE = {
+    "profiles": {"default": {"name": "Test", "codePages": {}, "features": {}}},
+    "encodings": {},
+}
+
+
+@pytest.fixture
+def database(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch) -> pathlib.Path:
+    """Point the loader to a new capabilities file and cache directory."""
+    capabilities_file = tmp_path / "capabilities.json"
+    capabilities_file.write_text(json.dumps(DATABASE))
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setattr(capabilities, "capabilities_path", str(capabilities_file))
+    monkeypatch.setattr(capabilities, "pickle_dir", str(cache_dir))
+    monkeypatch.setattr(capabilities, "pickle_path", str(cache_dir / "test.pickle"))
+    monkeypatch.setattr(capabilities, "_capabilities", None)
+    return capabilities_file
+
+
+def test_load_json(database: pathlib.Path) -> None:
+    assert capabilities.get_capabilities() == DATABASE
+    assert capabilities.CAPABILITIES is capabilities.get_capabilities()
+
+
+def test_load_yaml_fallback(database: pathlib.Path) -> None:
+    database.write_text("profiles:\n  default:\n    name: Yaml\nencodings: {}\n")
+    assert capabilities.get_capabilities()["profiles"]["default"]["name"] == "Yaml"
+
+
+def test_persistent_cache(database: pathlib.Path) -> None:
+    capabilities.get_capabilities()
+    # no temporary files are left behind
+    assert os.listdir(capabilities.pickle_dir) == ["test.pickle"]
+    capabilities._capabilities = None
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(capabilities, "_parse_capabilities", None)
+        assert capabilities.get_capabilities() == DATABASE
+
+
+def test_index_is_lazy(database: pathlib.Path) -> None:
+    capabilities.get_capabilities()
+    capabilities._capabilities = None
+    database_index = capabilities.get_capabilities()
+    profiles = database_index["profiles"]
+    assert isinstance(profiles, capabilities.LazyRecords)
+    assert "default" in profiles and "other" not in profiles
+    assert not profiles._records
+    assert profiles["default"] == DATABASE["profiles"]["default"]
+    assert profiles["default"] is profiles["default"]
+    assert list(profiles) == ["default"]
+    assert len(database_index["encodings"]) == 0
+
+
+def test_corrupt_cache(database: pathlib.Path) -> None:
+    pathlib.Path(capabilities.pickle_dir).mkdir()
+    pathlib.Path(capabilities.pickle_path).write_bytes(b"not an index")
+    assert capabilities.get_capabilities() == DATABASE
+    # the file has been replaced
+    capabilities._capabilities = None
+    assert isinstance(
+        capabilities.get_capabilities()["profiles"], capabilities.LazyRecords
+    )
+
+
+def test_stale_cache(database: pathlib.Path) -> None:
+    capabilities.get_capabilities()
+    capabilities._capabilities = None
+    database.write_text(json.dumps({"profiles": {}, "encodings": {"A": {}}}))
+    assert capabilities.get_capabilities()["encodings"] == {"A": {}}
+
+
+def test_unwritable_cache(database: pathlib.Path) -> None:
+    # the cache directory can't be created where a file is
+    pathlib.Path(capabilities.pickle_dir).write_text("")
+    assert capabilities.get_capabilities() == DATABASE
+
+
+def test_lazy_load() -> None:
+    """Importing the printers doesn't load the database."""
+    code = (
+        "import escpos.printer, escpos.capabilities as c; "
+        "assert c._capabilities is None; "
+        "c.Profile(columns=10); "
+        "assert c._capabilities is None"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
@@ -0,0 +1,63 @@
+#!/usr/bin/python
+"""tests for the precomputed code page tables
+
+:author: python-escpos developers
+:organization: `python-escpos <https://github.com/python-escpos>`_
+:copyright: Copyright (c) 2026 `python-escpos <https://github.com/python-escpos>`_
+:license: MIT
+"""
+
+import pathlib
+
+import pytest
+
+from escpos.capabilities import capabilities_path
+from escpos.codepage_tables import CodePageTables, codepage_chars, write_tables
+from escpos.codepages import CodePageManager, CodePages
+from escpos.magicencode import Encoder
+
+
+@pytest.fixture
+def tables_file(tmp_path: pathlib.Path) -> str:
+    """Build the tables of the capabilities in use."""
+    tables_filename = str(tmp_path / "codepages.bin")
+    write_tables(str(capabilities_path), tables_filename)
+    return tables_filename
+
+
+def test_tables_match_runtime(tables_file: str) -> None:
+    """Every code page of the tables is equal to the one computed at runtime."""
+    tables = CodePageTables(tables_file, str(capabilities_path))
+    for encoding, codepage in CodePages.data.items():
+        assert tables.get(encoding) == codepage_chars(codepage)
+
+
+def test_unknown_encoding(tables_file: str) -> None:
+    """Encodings that are not in the tables are reported as missing."""
+    tables = CodePageTables(tables_file, str(capabilities_path))
+    assert tables.get("UNKNOWN") is None
+
+
+def test_missing_file(tmp_path: pathlib.Path) -> None:
+    """Without the tables the code pages are computed at runtime."""
+    tables = CodePageTables(str(tmp_path / "missing.bin"), str(capabilities_path))
+    assert tables.get("CP437") is None
+    manager = CodePageManager(CodePages.data, tables)
+    assert manager.get_characters("CP437") == codepage_chars(CodePages.data["CP437"])
+
+
+def test_stale_file(tables_file: str, tmp_path: pathlib.Path) -> None:
+    """Tables that were built from another capabilities file are ignored."""
+    other_capabilities = tmp_path / "capabilities.json"
+    other_capabilities.write_text("{}")
+    tables = CodePageTables(tables_file, str(other_capabilities))
+    assert tables.get("CP437") is None
+
+
+def test_encoder_uses_tables(tables_file: str, monkeypatch) -> None:
+    """The encoder reads the code pages from the tables."""
+    tables = CodePageTables(tables_file, str(capabilities_path))
+    chars = list(codepage_chars(CodePages.data["CP437"]) or "")
+    monkeypatch.setattr(CodePages, "tables", tables)
+    monkeypatch.setattr(CodePages, "data", {})
+    assert Encoder._get_codepage_char_list("CP437") == chars
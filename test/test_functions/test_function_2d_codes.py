@@ -0,0 +1,162 @@
+#!/usr/bin/python
+"""tests for the native 2D codes PDF417, DataMatrix, Aztec and MaxiCode
+
+:author: python-escpos developers
+:organization: `python-escpos <https://github.com/python-escpos>`_
+:copyright: Copyright (c) 2026 `python-escpos <https://github.com/python-escpos>`_
+:license: MIT
+"""
+
+import importlib.util
+
+import pytest
+
+import escpos.printer as printer
+from escpos.capabilities import Profile
+from escpos.constants import (
+    AZTEC_COMPACT,
+    DATAMATRIX_RECTANGLE,
+    MAXICODE_MODE_2,
+    PDF417_TRUNCATED,
+)
+from escpos.exceptions import BarcodeCodeError, BarcodeTypeError
+
+
+@pytest.fixture
+def instance() -> printer.Dummy:
+    return printer.Dummy()
+
+
+def test_pdf417_defaults(instance: printer.Dummy) -> None:
+    """Test PDF417 with the default profile, which supports it natively"""
+    instance.pdf417("1234")
+    expected = (
+        b"\x1d(k\x03\x000A\x00\x1d(k\x03\x000B\x00\x1d(k\x03\x000C\x03"
+        b"\x1d(k\x03\x000D\x03\x1d(k\x04\x000E01\x1d(k\x03\x000F\x00"
+        b"\x1d(k\x07\x000P01234\x1d(k\x03\x000Q0"
+    )
+    assert instance.output == expected
+
+
+def test_pdf417_parameters(instance: printer.Dummy) -> None:
+    """Test PDF417 with all parameters"""
+    instance.pdf417(
+        b"\x00\xff",
+        columns=5,
+        rows=10,
+        width=2,
+        row_height=4,
+        ec=8,
+        options=PDF417_TRUNCATED,
+    )
+    expected = (
+        b"\x1d(k\x03\x000A\x05\x1d(k\x03\x000B\x0a\x1d(k\x03\x000C\x02"
+        b"\x1d(k\x03\x000D\x04\x1d(k\x04\x000E08\x1d(k\x03\x000F\x01"
+        b"\x1d(k\x05\x000P0\x00\xff\x1d(k\x03\x000Q0"
+    )
+    assert instance.output == expected
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [{"columns": 31}, {"rows": 2}, {"width": 9}, {"row_height": 1}, {"ec": 9}],
+)
+def test_pdf417_invalid(instance: printer.Dummy, kwargs: dict) -> None:
+    """Test PDF417 with invalid parameters"""
+    with pytest.raises(ValueError):
+        instance.pdf417("1234", **kwargs)
+
+
+@pytest.mark.skipif(
+    importlib.util.find_spec("pdf417gen") is not None,
+    reason="pdf417gen is installed",
+)
+def test_pdf417_no_software_renderer() -> None:
+    """Test PDF417 without native support and without software renderer"""
+    instance = printer.Dummy(profile=Profile(features={}))
+    with pytest.raises(BarcodeTypeError):
+        instance.pdf417("1234")
+
+
+def test_pdf417_truncated_software() -> None:
+    """Test that truncated PDF417 codes are not rendered in software"""
+    instance = printer.Dummy(profile=Profile(features={}))
+    with pytest.raises(BarcodeTypeError):
+        instance.pdf417("1234", options=PDF417_TRUNCATED)
+
+
+def test_empty_content(instance: printer.Dummy) -> None:
+    """Test that 2D codes refuse empty content"""
+    with pytest.raises(BarcodeCodeError):
+        instance.pdf417("")
+
+
+def test_datamatrix(instance: printer.Dummy) -> None:
+    """Test native DataMatrix"""
+    instance.datamatrix("1234", native=True)
+    expected = (
+        b"\x1d(k\x05\x006B\x00\x00\x00\x1d(k\x03\x006C\x03"
+        b"\x1d(k\x07\x006P01234\x1d(k\x03\x006Q0"
+    )
+    assert instance.output == expected
+
+
+def test_datamatrix_rectangle(instance: printer.Dummy) -> None:
+    """Test native rectangular DataMatrix"""
+    instance.datamatrix(
+        "1234", size=4, symbol=DATAMATRIX_RECTANGLE, columns=32, rows=8, native=True
+    )
+    assert instance.output.startswith(b"\x1d(k\x05\x006B\x01 \x08\x1d(k\x03\x006C\x04")
+
+
+def test_datamatrix_feature() -> None:
+    """Test that the feature of the profile enables native DataMatrix"""
+    instance = printer.Dummy(profile=Profile(features={"dataMatrixCode": True}))
+    instance.datamatrix("1234")
+    assert instance.output.startswith(b"\x1d(k\x05\x006B")
+
+
+def test_aztec(instance: printer.Dummy) -> None:
+    """Test native Aztec code"""
+    instance.aztec("1234", symbol=AZTEC_COMPACT, layers=2, native=True)
+    expected = (
+        b"\x1d(k\x04\x005B\x01\x02\x1d(k\x03\x005C\x03\x1d(k\x03\x005E\x17"
+        b"\x1d(k\x07\x005P01234\x1d(k\x03\x005Q0"
+    )
+    assert instance.output == expected
+
+
+def test_aztec_invalid_layers(instance: printer.Dummy) -> None:
+    """Test that compact Aztec codes are limited to 4 layers"""
+    with pytest.raises(ValueError):
+        instance.aztec("1234", symbol=AZTEC_COMPACT, layers=5, native=True)
+
+
+def test_aztec_unsupported(instance: printer.Dummy) -> None:
+    """Test that Aztec codes without native support raise an error"""
+    with pytest.raises(BarcodeTypeError):
+        instance.aztec("1234", native="auto")
+
+
+def test_maxicode() -> None:
+    """Test native MaxiCode"""
+    instance = printer.Dummy(profile=Profile(features={"maxiCode": True}))
+    instance.maxicode("1234", mode=MAXICODE_MODE_2)
+    expected = b"\x1d(k\x03\x002A2\x1d(k\x07\x002P01234\x1d(k\x03\x002Q0"
+    assert instance.output == expected
+
+
+def test_maxicode_unsupported(instance: printer.Dummy) -> None:
+    """Test that MaxiCodes without native support raise an error"""
+    with pytest.raises(BarcodeTypeError):
+        instance.maxicode("1234", native=False)
+
+
+@pytest.mark.parametrize("profile", ["default", "TM-T88V"])
+@pytest.mark.parametrize("method", ["datamatrix", "aztec", "maxicode"])
+def test_native_by_default(profile: str, method: str) -> None:
+    """Test that the 2D codes are rendered natively with the profiles of the database"""
+    instance = printer.Dummy(profile=profile)
+    getattr(instance, method)("1234")
+    assert instance.output.startswith(b"\x1d(k")
+    assert instance.output.endswith(b"Q0")
@@ -8,11 +8,14 @@
 """
 
 
+import mock
 import pytest
 from PIL import Image
 
+import escpos.image
 import escpos.printer as printer
 from escpos.exceptions import ImageWidthError
+from escpos.image import EscposImage
 
 
 # Raster format print
@@ -161,6 +164,67 @@ def test_large_graphics() -> None:
     )
 
 
+def test_bit_image_raster_data() -> None:
+    """
+    Test printing packed raster data
+    """
+    instance = printer.Dummy()
+    instance.image(EscposImage(b"\xc0\x00", width=2, height=2), impl="bitImageRaster")
+    assert instance.output == b"\x1dv0\x00\x01\x00\x02\x00\xc0\x00"
+
+
+def test_bit_image_pbm(tmp_path) -> None:
+    """
+    Test printing a binary PBM file
+    """
+    pbm = tmp_path / "black_white.pbm"
+    pbm.write_bytes(b"P4 2 2\n\xc0\x00")
+    instance = printer.Dummy()
+    instance.image(str(pbm), impl="graphics")
+    assert (
+        instance.output
+        == b"\x1d(L\x0c\x000p0\x01\x011\x02\x00\x02\x00\xc0\x00\x1d(L\x02\x0002"
+    )
+
+
+@pytest.mark.parametrize("fragment_height", [960, 1])
+def test_bit_image_pbm_unmapped(tmp_path, fragment_height: int) -> None:
+    """
+    Test that a binary PBM file is unmapped after printing
+    """
+    pbm = tmp_path / "black_white.pbm"
+    pbm.write_bytes(b"P4 2 2\n\xc0\x00")
+    mapped = []
+
+    def map_pbm(filename):
+        result = map_pbm_orig(filename)
+        mapped.append(result[0])
+        return result
+
+    map_pbm_orig = escpos.image._map_pbm
+    instance = printer.Dummy()
+    with mock.patch("escpos.image._map_pbm", side_effect=map_pbm):
+        instance.image(str(pbm), fragment_height=fragment_height)
+    assert len(mapped) == 1
+    assert mapped[0].closed
+
+
+def test_large_raster_data() -> None:
+    """
+    Test whether raster data that induces a fragmentation is handled correctly.
+    """
+    instance = printer.Dummy()
+    instance.image(
+        EscposImage(b"\xc0\x00", width=2, height=2),
+        impl="bitImageRaster",
+        fragment_height=1,
+    )
+    assert (
+        instance.output
+        == b"\x1dv0\x00\x01\x00\x01\x00\xc0\x1dv0\x00\x01\x00\x01\x00\x00"
+    )
+
+
 @pytest.fixture
 def dummy_with_width() -> printer.Dummy:
     instance = printer.Dummy()
@@ -180,6 +244,18 @@ def test_width_too_large(dummy_with_width: printer.Dummy) -> None:
     instance.image(Image.new("RGB", (384, 200)))
 
 
+def test_width_too_large_not_converted(dummy_with_width: printer.Dummy) -> None:
+    """
+    Test that images which are too large in width are rejected before the conversion.
+    """
+    instance = dummy_with_width
+
+    with mock.patch.object(EscposImage, "_get_im") as get_im:
+        with pytest.raises(ImageWidthError):
+            instance.image(Image.new("RGB", (385, 200)))
+        get_im.assert_not_called()
+
+
 def test_center_image(dummy_with_width: printer.Dummy) -> None:
     instance = dummy_with_width
 
@@ -187,3 +263,15 @@ def test_center_image(dummy_with_width: printer.Dummy) -> None:
         instance.image(Image.new("RGB", (385, 200)), center=True)
 
     instance.image(Image.new("RGB", (384, 200)), center=True)
+
+
+def test_center_raster_data(dummy_with_width: printer.Dummy) -> None:
+    instance = dummy_with_width
+    im = EscposImage(b"\x80", width=1, height=1)
+    instance.image(im, center=True)
+    assert instance.output == (
+        b"\x1dv0\x000\x00\x01\x00" + b"\x00" * 23 + b"\x01" + b"\x00" * 24
+    )
+    # the image of the caller is not changed
+    assert im.size == (1, 1)
+    assert im.to_raster_format() == b"\x80"
@@ -11,7 +11,8 @@
 import pytest
 
 import escpos.printer as printer
-from escpos.constants import QR_ECLEVEL_H, QR_MODEL_1
+from escpos.capabilities import Profile
+from escpos.constants import QR_ECLEVEL_H, QR_MICRO, QR_MODEL_1
 
 
 def test_defaults() -> None:
@@ -101,3 +102,37 @@ def instance():
 def test_center_not_implementer(instance: printer.Dummy) -> None:
     with pytest.raises(NotImplementedError):
         instance.qr("test", center=True, native=True)
+
+
+def test_auto() -> None:
+    """Test that QR codes are rendered natively if the profile supports it"""
+    instance = printer.Dummy()
+    instance.qr("1234", native="auto")
+    expected = (
+        b"\x1d(k\x04\x001A2\x00\x1d(k\x03\x001C\x03\x1d(k\x03\x001E0\x1d"
+        b"(k\x07\x001P01234\x1d(k\x03\x001Q0"
+    )
+    assert instance.output == expected
+
+
+def test_auto_center() -> None:
+    """Test that centered QR codes are rendered in software"""
+    instance = printer.Dummy()
+    instance.qr("1234", native="auto", center=True)
+    assert b"\x1d(k" not in instance.output
+    assert b"\x1dv0" in instance.output
+
+
+def test_auto_unsupported() -> None:
+    """Test that QR codes are rendered in software if the profile lacks support"""
+    instance = printer.Dummy(profile=Profile(features={"bitImageRaster": True}))
+    instance.qr("1234", native="auto")
+    assert b"\x1d(k" not in instance.output
+    assert b"\x1dv0" in instance.output
+
+
+def test_auto_micro() -> None:
+    """Test that micro QR codes are rendered natively"""
+    instance = printer.Dummy()
+    instance.qr("1234", native="auto", model=QR_MICRO)
+    assert instance.output.startswith(b"\x1d(k\x04\x001A3\x00")
@@ -13,8 +13,8 @@ import warnings
 
 import mock
 import pytest
-from PIL import Image
 
+from escpos.image import EscposImage
 from escpos.printer import Dummy
 
 
@@ -40,17 +40,25 @@ def test_image() -> None:
     assert instance.output == expected
 
 
+def test_image_size() -> None:
+    """Test that the modules of a QR code are scaled by the size"""
+    instance = Dummy()
+    instance.qr("1", native=False, size=3)
+    # 21 modules and a border of one module on each side
+    assert instance.output.startswith(b"\x1bt\x00\n\x1dv0\x00\x09\x00\x45\x00")
+
+
 @mock.patch("escpos.printer.Dummy.image", spec=Dummy)
 def test_type_of_object_passed_to_image_function(img_function):
     """
     Test the type of object that is passed to the image function during non-native qr-printing.
 
-    The type should be PIL.Image
+    The type should be EscposImage, with the modules packed into raster data.
     """
     d = Dummy()
     d.qr("LoremIpsum")
     args, kwargs = img_function.call_args
-    assert isinstance(args[0], Image.Image)
+    assert isinstance(args[0], EscposImage)
 
 
 @mock.patch("escpos.printer.Dummy.image", spec=Dummy)
@@ -0,0 +1,33 @@
+import pytest
+
+from escpos import printer
+from escpos.batch import render
+
+
+def test_raw_bytes() -> None:
+    instance = printer.Dummy()
+    instance.raw_bytes(b"\x1b@abc\n")
+    assert instance.output == b"\x1b@abc\n"
+
+
+@pytest.mark.parametrize("data", [bytearray(b"abc"), memoryview(b"abc")])
+def test_raw_bytes_buffer(data) -> None:
+    instance = printer.Dummy()
+    instance.raw_bytes(data)
+    assert instance.output == b"abc"
+
+
+def test_raw_bytes_text() -> None:
+    instance = printer.Dummy()
+    with pytest.raises(TypeError):
+        instance.raw_bytes("abc")  # type: ignore [arg-type]
+
+
+def test_raw_bytes_prepared() -> None:
+    prepared = printer.Dummy()
+    prepared.qr("https://example.com", size=2)
+    rendered = render(("qr", {"content": "https://example.com", "size": 2}))
+    instance = printer.Dummy()
+    instance.raw_bytes(prepared.output)
+    instance.raw_bytes(rendered)
+    assert instance.output == prepared.output + rendered
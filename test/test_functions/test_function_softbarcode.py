@@ -4,6 +4,7 @@ import barcode.errors
 import pytest
 
 import escpos.printer as printer
+from escpos.constants import TXT_STYLE
 
 
 @pytest.fixture
@@ -24,3 +25,78 @@ def test_soft_barcode_ean8(instance: printer.Dummy) -> None:
 
 def test_soft_barcode_ean8_nocenter(instance: printer.Dummy) -> None:
     instance.barcode("1234567", "ean8", align_ct=False, force_software=True)
+
+
+def test_soft_barcode_raster(instance: printer.Dummy) -> None:
+    """test that the modules are rasterized with the module width in dots"""
+    instance.barcode(
+        "1234567",
+        "ean8",
+        height=2,
+        width=2,
+        align_ct=False,
+        pos="OFF",
+        force_software="bitImageRaster",
+    )
+    # 67 modules of 2 dots, the code starts with the guard 101 and the digit 1 (0011001)
+    row = b"\xcc<0\xc3\xcf\xf30<\xcc\xc3\xf30\x0c\x0c?\x0c\xcc"
+    assert instance.output == b"\x1dv0\x00\x11\x00\x02\x00" + row * 2
+
+
+def test_soft_barcode_guard(instance: printer.Dummy) -> None:
+    """test that guard bars are extended below the barcode"""
+    instance.barcode(
+        "400638133393", "ean13-guard", height=10, pos="OFF", force_software=True
+    )
+    # 95 modules of 3 dots, 10 rows of bars and one row of guard bars
+    assert b"\x1d(L\x96\x010p0\x01\x011\x1d\x01\x0b\x00" in instance.output
+
+
+@pytest.mark.parametrize(
+    "pos,above,below",
+    [("BELOW", False, True), ("ABOVE", True, False), ("BOTH", True, True)],
+)
+def test_soft_barcode_text(
+    instance: printer.Dummy, pos: str, above: bool, below: bool
+) -> None:
+    """test that the human-readable text is printed as text"""
+    instance.barcode("1234567", "ean8", pos=pos, force_software="bitImageRaster")
+    before, _, after = instance.output.partition(b"\x1dv0")
+    assert (b"12345670\n" in before) == above
+    assert after.endswith(b"12345670\n") == below
+
+
+def test_soft_barcode_text_off(instance: printer.Dummy) -> None:
+    """test that no text is printed with pos OFF"""
+    instance.barcode("1234567", "ean8", pos="OFF", force_software=True)
+    assert b"12345670" not in instance.output
+
+
+def test_soft_barcode_keep_alignment(instance: printer.Dummy) -> None:
+    """test that a centered barcode doesn't change the alignment of the printer"""
+    instance.barcode("1234567", "ean8", force_software="bitImageRaster")
+    assert TXT_STYLE["align"]["center"] not in instance.output
+    assert TXT_STYLE["align"]["left"] not in instance.output
+    # the text is padded to the 42 columns of font a of the default profile
+    assert instance.output.endswith(b" " * 17 + b"12345670\n")
+
+
+def test_soft_barcode_text_nocenter(instance: printer.Dummy) -> None:
+    """test that the text isn't padded without centering"""
+    instance.barcode("1234567", "ean8", align_ct=False, force_software="bitImageRaster")
+    assert instance.output.endswith(b"12345670\n")
+    assert b" 12345670" not in instance.output
+
+
+@pytest.mark.parametrize("pos", ["below ", "UNDER"])
+def test_soft_barcode_invalid_pos(instance: printer.Dummy, pos: str) -> None:
+    """test that an unknown text position is rejected"""
+    with pytest.raises(ValueError):
+        instance.barcode("1234567", "ean8", pos=pos, force_software=True)
+
+
+def test_soft_barcode_deprecated_arguments(instance: printer.Dummy) -> None:
+    """test that the arguments of the former image writer are still accepted"""
+    with pytest.warns(DeprecationWarning):
+        instance._sw_barcode("ean8", "1234567", text_distance=5, font_size=10)
+    assert b"12345670" in instance.output
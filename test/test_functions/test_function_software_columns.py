@@ -9,7 +9,14 @@
 """
 
 
+import re
+
+import hypothesis.strategies as st
 import pytest
+from hypothesis import given
+
+from escpos import printer
+from escpos.escpos import Escpos
 
 
 def test_rearrange_into_cols(driver) -> None:
@@ -78,3 +85,131 @@ def test_software_columns_valid_args(driver, text_list, widths, align) -> None:
     """
     driver.software_columns(text_list=text_list, widths=widths, align=align)
     driver.close()
+
+
+def test_software_columns_output(driver) -> None:
+    """
+    GIVEN a dummy printer object
+    WHEN printing some columns
+    THEN check the lines are wrapped, truncated and padded
+    """
+    driver.software_columns(
+        text_list=["fits", "row1 row2", "truncate and wrap"],
+        widths=[4, 5, 6],
+        align=["left", "center", "right"],
+    )
+    assert driver.output.endswith(
+        b"fitsrow1 trunc.\n    row2    and\n           wrap\n"
+    )
+
+
+def test_table_single_write(driver) -> None:
+    """
+    GIVEN a dummy printer object
+    WHEN printing a table with several rows
+    THEN check the whole table is sent with one write
+    """
+    driver.table(
+        [["Item", "Qty"], ["Coffee beans", "2"], ["Tea"]],
+        widths=[8, 4],
+        align=["left", "right"],
+    )
+    assert len(driver._output_list) == 1
+    assert driver.output.endswith(
+        b"Item     Qty\n" b"Coffee     2\n" b"beans       \n" b"Tea         \n"
+    )
+
+
+def test_table_matches_software_columns(driver) -> None:
+    """
+    GIVEN a dummy printer object
+    WHEN printing the rows of a table one by one with software_columns
+    THEN check the output is the same as of the table
+    """
+    rows = [["col1", "wrap this string", "x"], ["truncate_this_string", "", "y z"]]
+    for row in rows:
+        driver.software_columns(row, widths=30, align="justify")
+    table_driver = printer.Dummy()
+    table_driver.table(rows, widths=30, align="justify")
+    assert table_driver.output == driver.output
+
+
+def test_table_wide_characters(driver) -> None:
+    """
+    GIVEN a table with Chinese text
+    WHEN wrapping and padding the cells
+    THEN check wide characters are counted as two columns
+    """
+    assert driver._text_width("価格") == 4
+    assert driver._text_width("é") == 1
+    assert driver._wrap_cell("牛乳とパン", 6) == ["牛乳と", "パン"]
+    assert driver._wrap_cell("お茶 two", 6) == ["お茶", "two"]
+    assert driver._pad_cell("パン", 6, "right") == "  パン"
+    assert driver._pad_cell("パン", 6, "center") == " パン "
+
+
+@given(
+    text=st.text(alphabet=st.characters(max_codepoint=0x24F)),
+    width=st.integers(min_value=2, max_value=12),
+)
+def test_table_latin_like_software_columns(text: str, width: int) -> None:
+    """
+    GIVEN a text without wide East Asian characters
+    WHEN wrapping it into a table cell
+    THEN check it is wrapped and truncated like by _rearrange_into_cols
+    """
+    driver = printer.Dummy()
+    expected = [row[0] for row in driver._rearrange_into_cols([text], [width])]
+    assert driver._wrap_cell(text, width) == expected
+
+
+def test_table_accented_words_are_truncated(driver) -> None:
+    """
+    GIVEN a word with accented letters that is too long for its column
+    WHEN printing it in a table
+    THEN check it is truncated, not broken
+    """
+    assert driver._wrap_cell("Käsespätzle", 6) == ["Käses."]
+    assert driver._pad_cell("Grüße", 6, "right") == " Grüße"
+
+
+def test_table_empty(driver) -> None:
+    """
+    GIVEN a dummy printer object
+    WHEN printing a table without rows
+    THEN check nothing is sent
+    """
+    driver.table([], widths=10, align="left")
+    assert driver.output == b""
+
+
+def _justify_by_substitution(txt: str, width: int) -> str:
+    """Justify text by adding spaces to the whitespace in several passes."""
+    prev_txt = txt
+    while (length := width - len(txt)) > 0:
+        txt = re.sub(r"(\s+)", r"\1 ", txt, count=length)
+        if txt == prev_txt:
+            break
+    return txt.rjust(width)
+
+
+@given(
+    text=st.text(alphabet=st.sampled_from("ab \t\u3000")),
+    width=st.integers(min_value=-1, max_value=40),
+)
+def test_justify(text: str, width: int) -> None:
+    """
+    GIVEN a text and a width
+    WHEN justifying the text
+    THEN check the output is the same as of adding the spaces pass by pass
+    """
+    assert Escpos._justify(text, width) == _justify_by_substitution(text, width)
+
+
+def test_justify_long_line(driver) -> None:
+    """
+    GIVEN a text with a single gap
+    WHEN justifying it to a very long line
+    THEN check all spaces are added to the gap
+    """
+    assert driver._justify("a b", 10000) == f"a{' ' * 9998}b"
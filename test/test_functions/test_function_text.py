@@ -7,6 +7,7 @@
 :license: MIT
 """
 
+import typing
 
 import hypothesis.strategies as st
 import mock
@@ -38,6 +39,60 @@ def test_block_text() -> None:
     )
 
 
+def test_block_text_justify() -> None:
+    printer = get_printer()
+    printer.block_text(
+        "All the presidents men were eating falafel for breakfast.",
+        columns=20,
+        justify=True,
+    )
+    assert printer.output == (
+        b"All  the  presidents\n"
+        b"men    were   eating\n"
+        b"falafel          for\n"
+        b"breakfast."
+    )
+
+
+@given(chunks=st.lists(st.text(alphabet=st.characters(max_codepoint=0x7F))))
+def test_write_stream_ascii(chunks: typing.List[str]) -> None:
+    """Test that write_stream() prints ASCII text like text()."""
+    printer = get_printer()
+    printer.write_stream(iter(chunks))
+    assert printer.output == "".join(chunks).encode("ascii")
+
+
+def test_write_stream() -> None:
+    """Test that write_stream() keeps the code page and kanji mode across chunks."""
+    chunks = ["Grüße ", "– 5 €", "\n中", "文 ok"]
+    stream_printer = Dummy()
+    stream_printer.write_stream(iter(chunks))
+    text_printer = Dummy()
+    text_printer.text("".join(chunks))
+    assert stream_printer.output == text_printer.output
+
+
+def test_write_stream_writes_chunks() -> None:
+    """Test that write_stream() sends the chunks as they arrive."""
+    printer = get_printer()
+    with mock.patch.object(printer, "_raw") as raw:
+        printer.write_stream(["hello, ", "", "world\n"])
+    assert raw.call_args_list == [mock.call(b"hello, "), mock.call(b"world\n")]
+
+
+def test_write_stream_is_lazy() -> None:
+    """Test that write_stream() prints each chunk before the next one is produced."""
+    printer = get_printer()
+
+    def chunks() -> typing.Iterator[str]:
+        for line in range(3):
+            yield f"line {line}\n"
+            assert printer.output.endswith(f"line {line}\n".encode())
+
+    printer.write_stream(chunks())
+    assert printer.output == b"line 0\nline 1\nline 2\n"
+
+
 def test_textln() -> None:
     printer = get_printer()
     printer.textln("hello, world")
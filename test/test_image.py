@@ -7,10 +7,21 @@ converted to ESC/POS column & raster formats.
 :copyright: Copyright (c) 2016 `Michael Billington <michael.billington@gmail.com>`_
 :license: MIT
 """
+import types
+import typing
 from typing import List
 
+import pytest
+
+import escpos.image
 from escpos.image import EscposImage
 
+np: typing.Optional[types.ModuleType]
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 
 def test_image_black() -> None:
     """
@@ -62,6 +73,126 @@ def test_split() -> None:
     assert lower_part.to_raster_format() == b"\x00"
 
 
+def test_lazy_conversion() -> None:
+    """
+    test that images are only converted when an ESC/POS format is requested
+    """
+    im = EscposImage("test/resources/black_white.png")
+    assert im.width == 2
+    assert im.height == 2
+    assert im._im is None
+    assert im.img_original is not None
+    assert im.to_raster_format() == b"\xc0\x00"
+    # the original image is dropped after the conversion
+    assert im.img_original is None
+
+
+def test_split_converted() -> None:
+    """
+    test that converted images are split into converted fragments
+    """
+    im = EscposImage("test/resources/black_white.png")
+    im.center(4)
+    (upper_part, lower_part) = im.split(1)
+    assert upper_part.to_raster_format() == b"\x60"
+    assert lower_part.to_raster_format() == b"\x00"
+
+
+def test_raster_buffer() -> None:
+    """
+    test that packed raster data is passed through unchanged
+    """
+    for buffer in (b"\xc0\x00", bytearray(b"\xc0\x00"), memoryview(b"\xc0\x00")):
+        im = EscposImage(buffer, width=2, height=2)
+        assert im.width == 2
+        assert im.height == 2
+        assert im.to_raster_format() == b"\xc0\x00"
+        assert list(im.to_column_format(False)) == [b"\x80\x80"]
+
+
+@pytest.mark.skipif(not np, reason="numpy not installed")
+def test_raster_numpy() -> None:
+    """
+    test that packed raster data can be passed as NumPy array
+    """
+    assert np is not None
+    im = EscposImage(np.array([[0xC0], [0x00]], dtype=np.uint8), width=2, height=2)
+    assert im.to_raster_format() == b"\xc0\x00"
+
+
+def test_raster_invalid() -> None:
+    """
+    test that raster data has to match the dimensions
+    """
+    with pytest.raises(ValueError):
+        EscposImage(b"\xc0\x00", width=2, height=3)
+    with pytest.raises(ValueError):
+        EscposImage(b"\xc0\x00", width=2)
+
+
+def test_raster_split() -> None:
+    """
+    test that raster data is split into views on the rows
+    """
+    im = EscposImage(b"\xff\x01\x80\x00\x0f\xf0", width=9, height=3)
+    (upper_part, lower_part) = im.split(2)
+    assert upper_part.height == 2
+    assert lower_part.height == 1
+    assert upper_part.to_raster_format() == b"\xff\x01\x80\x00"
+    assert lower_part.to_raster_format() == b"\x0f\xf0"
+
+
+def test_pbm(tmp_path) -> None:
+    """
+    test loading a binary PBM file
+    """
+    pbm = tmp_path / "black_white.pbm"
+    pbm.write_bytes(b"P4\n# black white\n2 2\n\xc0\x00")
+    im = EscposImage(str(pbm))
+    assert im.width == 2
+    assert im.height == 2
+    assert im.to_raster_format() == b"\xc0\x00"
+    assert im.img_original is None
+
+
+def test_pbm_close(tmp_path) -> None:
+    """
+    test that closing an image loaded from a binary PBM file unmaps the file
+    """
+    pbm = tmp_path / "black_white.pbm"
+    pbm.write_bytes(b"P4\n2 2\n\xc0\x00")
+    with EscposImage(str(pbm)) as im:
+        mapping = im._mapping
+        assert mapping is not None
+        assert im.to_raster_format() == b"\xc0\x00"
+    assert mapping.closed
+    with pytest.raises(ValueError):
+        im.to_raster_format()
+
+
+def test_pbm_close_fragments(tmp_path) -> None:
+    """
+    test that fragments of a closed PBM image can still be used
+    """
+    pbm = tmp_path / "black_white.pbm"
+    pbm.write_bytes(b"P4\n2 2\n\xc0\x00")
+    im = EscposImage(str(pbm))
+    upper, lower = im.split(1)
+    im.close()
+    assert upper.to_raster_format() == b"\xc0"
+    assert lower.to_raster_format() == b"\x00"
+
+
+def test_pbm_truncated(tmp_path) -> None:
+    """
+    test that a binary PBM file with too few raster bytes is rejected
+    """
+    pbm = tmp_path / "truncated.pbm"
+    pbm.write_bytes(b"P4\n16 4\n\xff\xff\xff\xff")
+    with pytest.raises(ValueError):
+        EscposImage(str(pbm))
+
+
 def _load_and_check_img(
     filename: str,
     width_expected: int,
@@ -80,3 +211,16 @@ def _load_and_check_img(
     for row in im.to_column_format(False):
         assert row == column_format_expected[i]
         i += 1
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_from_matrix(monkeypatch: pytest.MonkeyPatch, use_numpy: bool) -> None:
+    """Test packing a matrix of modules into raster data."""
+    if use_numpy and not np:
+        pytest.skip("numpy not installed")
+    if not use_numpy:
+        monkeypatch.setattr(escpos.image, "np", None)
+    matrix = [[True, False, True], [False, True, False]]
+    escpos_image = EscposImage.from_matrix(matrix, scale=3)
+    assert escpos_image.size == (9, 6)
+    assert bytes(escpos_image.to_raster_format()) == (b"\xe3\x80" * 3 + b"\x1c\x00" * 3)
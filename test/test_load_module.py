@@ -7,6 +7,9 @@
 :license: MIT
 """
 
+import json
+import subprocess
+import sys
 
 import escpos.printer as printer
 
@@ -15,3 +18,48 @@ def test_instantiation() -> None:
     """test the instantiation of a escpos-printer class and basic printing"""
     instance = printer.Dummy()
     instance.text("This is a test\n")
+
+
+def test_lazy_imports() -> None:
+    """test that printing text doesn't import the libraries for images and barcodes"""
+    code = (
+        "import json, sys, time\n"
+        "start = time.perf_counter()\n"
+        "import escpos.escpos\n"
+        "seconds = time.perf_counter() - start\n"
+        "from escpos.printer import Dummy\n"
+        "Dummy().textln('hello')\n"
+        "print(json.dumps({'seconds': seconds, 'modules': sorted(sys.modules)}))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], check=True, capture_output=True, text=True
+    )
+    imported = json.loads(result.stdout)
+    heavy_modules = {"PIL", "numpy", "barcode", "qrcode", "yaml"}
+    assert heavy_modules.isdisjoint(imported["modules"])
+    # generous limit, the import takes a few milliseconds on a warm cache
+    assert imported["seconds"] < 1.0
+
+
+def test_lazy_printer_backends(tmp_path) -> None:
+    """test that only the printer implementation in use is imported"""
+    config_file = tmp_path / "config.yaml"
+    config_file.write_text("printer:\n   type: network\n   host: localhost\n")
+    code = (
+        "import json, sys\n"
+        "from escpos import config, printer\n"
+        "loaded = [name for name in sys.modules if name.startswith('escpos.printer.')]\n"
+        "c = config.Config()\n"
+        f"c.load(config_path={str(config_file)!r})\n"
+        "configured = [name for name in sys.modules if name.startswith('escpos.printer.')]\n"
+        "c.printer()\n"
+        "used = [name for name in sys.modules if name.startswith('escpos.printer.')]\n"
+        "print(json.dumps([loaded, configured, used]))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], check=True, capture_output=True, text=True
+    )
+    loaded, configured, used = json.loads(result.stdout)
+    assert loaded == []
+    assert configured == []
+    assert used == ["escpos.printer.network"]
@@ -7,17 +7,26 @@
 :copyright: Copyright (c) 2016 `python-escpos <https://github.com/python-escpos>`_
 :license: MIT
 """
+import codecs
 import types
 import typing
 
 import hypothesis.strategies as st
+import mock
 import pytest
 from hypothesis import example, given
 
 from escpos import printer
 from escpos.exceptions import Error
 from escpos.katakana import encode_katakana
-from escpos.magicencode import Encoder, MagicEncode
+from escpos.magicencode import (
+    Encoder,
+    IncrementalEncoder,
+    MagicEncode,
+    get_encoding_context,
+    segment_text,
+    split_writable_text,
+)
 
 
 class TestEncoder:
@@ -41,10 +50,129 @@ class TestEncoder:
         for character in ("Á", "É", "Í", "Ó", "Ú"):
             assert enc.find_suitable_encoding(character) == "CP857"
 
+    def test_find_suitable_encoding_prefers_used(self) -> None:
+        enc = Encoder({"CP437": 1, "CP858": 2})
+        assert enc.find_suitable_encoding("€") == "CP858"
+        # both code pages can encode "á", the one used before is preferred
+        assert enc.find_suitable_encoding("á") == "CP858"
+        assert Encoder({"CP437": 1, "CP858": 2}).find_suitable_encoding("á") == "CP437"
+
+    def test_character_index_is_shared(self) -> None:
+        character_index, ascii_encodings = Encoder(
+            {"CP437": 1, "CP858": 2}
+        )._get_character_index()
+        assert Encoder({"CP437": 1, "CP858": 2})._get_character_index()[0] is (
+            character_index
+        )
+        assert character_index["á"] == ("CP437", "CP858")
+        assert ascii_encodings == ("CP437", "CP858")
+
+    def test_context_is_shared(self) -> None:
+        encoder = Encoder({"CP437": 1, "CP858": 2})
+        other = Encoder({"CP437": 1, "CP858": 2})
+        assert encoder.context is other.context
+        assert encoder.available_characters["CP858"] is (
+            other.available_characters["CP858"]
+        )
+        # only the used code pages are kept per encoder
+        encoder.find_suitable_encoding("€")
+        assert not other.used_encodings
+        with pytest.raises(TypeError):
+            encoder.codepages["CP850"] = 3  # type: ignore [index]
+        with pytest.raises(AttributeError):
+            encoder.context.codepages = {}  # type: ignore [misc]
+
+    def test_context_orders_slots(self) -> None:
+        context = get_encoding_context({"CP858": 19, "CP437": 0})
+        assert context.ascii_encodings == ("CP437", "CP858")
+        assert context.character_index["á"] == ("CP437", "CP858")
+
+    def test_slot_order_unchanged(self, driver: printer.Dummy) -> None:
+        # the slots of the profile are compared as given, CP857 in slot "13"
+        # comes before CP850 in slot "2"
+        encode = MagicEncode(driver)
+        encode.write("ı")
+        assert driver.output == b"\x1bt\r\x8d"
+
     def test_get_encoding(self) -> None:
         with pytest.raises(ValueError):
             Encoder({}).get_encoding_name("latin1")
 
+    def test_encode(self) -> None:
+        assert Encoder({"CP437": 1}).encode("á€b", "CP437") == b"\xa0?b"
+        assert Encoder({"CP437": 1}).encode("€€", "CP437", "*") == b"**"
+        assert Encoder({"CP437": 1}).encode("", "CP437") == b""
+
+    def test_encode_ascii_in_high_positions(self) -> None:
+        # the code page lists " " and "`" in the upper half,
+        # those are encoded as ASCII nevertheless
+        assert Encoder({"OXHOO-EUROPEAN": 1}).encode(" `", "OXHOO-EUROPEAN") == b" `"
+
+    @given(text=st.text())
+    def test_encode_matches_character_map(self, text: str) -> None:
+        encoder = Encoder({"CP858": 1})
+        char_map = encoder._get_codepage_char_map("CP858")
+        expected = bytes(
+            ord(char) if ord(char) < 128 else char_map.get(char, ord("?"))
+            for char in text
+        )
+        assert encoder.encode(text, "CP858") == expected
+
+
+class TestSplitWritableText:
+    """
+    Tests splitting off the writable text.
+    """
+
+    def test_split(self) -> None:
+        encoder = Encoder({"CP437": 1})
+        assert split_writable_text(encoder, "abá€c", "CP437") == ("abá", "€c")
+        assert split_writable_text(encoder, "€c", "CP437") == ("", "€c")
+        assert split_writable_text(encoder, "abá", "CP437") == ("abá", None)
+        assert split_writable_text(encoder, "abá", None) == (None, "abá")
+
+    def test_split_unknown_codepage(self) -> None:
+        encoder = Encoder({"foobar": 1})
+        assert split_writable_text(encoder, "abc", "foobar") == ("", "abc")
+
+    @given(text=st.text())
+    def test_split_matches_can_encode(self, text: str) -> None:
+        encoder = Encoder({"CP858": 1})
+        writable, rest = split_writable_text(encoder, text, "CP858")
+        assert all(encoder.can_encode("CP858", char) for char in writable)
+        assert (writable + (rest or "")) == text
+        assert not rest or not encoder.can_encode("CP858", rest[0])
+
+
+class TestSegmentText:
+    """
+    Tests splitting up the text with the least code page changes.
+    """
+
+    def test_keep_encoding(self) -> None:
+        encoder = Encoder({"CP437": 1, "CP858": 2})
+        assert segment_text(encoder, "abá", "CP437") == [("CP437", "abá")]
+        assert segment_text(encoder, "", "CP437") == []
+
+    def test_single_change(self) -> None:
+        # greedy would write "é" in CP437 and change to CP858 for "€"
+        encoder = Encoder({"CP437": 1, "CP858": 2})
+        assert segment_text(encoder, "é€ é", "CP437") == [("CP858", "é€ é")]
+
+    def test_change_before_character(self) -> None:
+        encoder = Encoder({"CP437": 1, "CP858": 2})
+        assert segment_text(encoder, "ab€", "CP437") == [
+            ("CP437", "ab"),
+            ("CP858", "€"),
+        ]
+
+    def test_lookahead(self) -> None:
+        encoder = Encoder({"CP437": 1, "CP858": 2})
+        assert segment_text(encoder, "é€ é", "CP437", lookahead=1) == [
+            ("CP437", "é"),
+            ("CP858", "€ é"),
+        ]
+
 
 class TestMagicEncode:
     """
@@ -102,6 +230,114 @@ class TestMagicEncode:
             encode.write("€ ist teuro.")
             assert driver.output == b"_ ist teuro."
 
+        def test_write_single_raw(self, driver: printer.Dummy) -> None:
+            encode = MagicEncode(driver)
+            with mock.patch.object(driver, "_raw") as raw:
+                encode.write("ŞĞ€éж")
+            raw.assert_called_once()
+
+        def test_write_minimize_switches(self, driver: printer.Dummy) -> None:
+            greedy = printer.Dummy()
+            MagicEncode(greedy).write("ŞĞ€éж")
+            assert greedy.output.count(b"\x1bt") == 4
+            encode = MagicEncode(driver, minimize_switches=True)
+            encode.write("ŞĞ€éж")
+            assert driver.output == b"\x1bt0\xde\xd0\x80\xe9\x1bt\x11\xa6"
+
+        def test_write_minimize_switches_no_codepage(
+            self, driver: printer.Dummy
+        ) -> None:
+            encode = MagicEncode(
+                driver,
+                defaultsymbol="_",
+                encoder=Encoder({"CP437": 1}),
+                minimize_switches=True,
+            )
+            encode.write("€ ist teuro.")
+            assert driver.output == b"\x1bt\x01_ ist teuro."
+
+        def test_write_cached(self, driver: printer.Dummy) -> None:
+            texts = ["Total:", " 5 €\n", "Ελληνικά\n", "Total:", " 5 €\n"] * 3
+            uncached = printer.Dummy()
+            uncached_encode = MagicEncode(uncached)
+            encode = MagicEncode(driver, cache_entries=16)
+            for text in texts:
+                uncached_encode.write(text)
+                encode.write(text)
+            assert driver.output == uncached.output
+            assert encode.encoding == uncached_encode.encoding
+            assert encode.cache is not None
+            assert encode.cache.statistics.misses == 5
+            assert encode.cache.statistics.hits == 10
+
+        def test_write_cache_disabled(self, driver: printer.Dummy) -> None:
+            assert MagicEncode(driver).cache is None
+
+    class TestKanjiMode:
+        def test_mixed_scripts(self, driver: printer.Dummy) -> None:
+            encode = MagicEncode(driver, encoding="CP437")
+            encode.write("中文 café")
+            assert driver.output == b"\x1c&\xd6\xd0\xce\xc4\x1c. caf\x82"
+
+        def test_switch_only_when_needed(self, driver: printer.Dummy) -> None:
+            encode = MagicEncode(driver, encoding="CP437")
+            encode.write("中")
+            encode.write("abc")
+            assert encode.kanji_mode
+            encode.write("é")
+            assert not encode.kanji_mode
+            assert driver.output == b"\x1c&\xd6\xd0abc\x1c.\x82"
+
+        def test_shift_jis(self, driver: printer.Dummy) -> None:
+            encode = MagicEncode(
+                driver, encoding="CP437", multibyte_encoding="SHIFT_JIS"
+            )
+            encode.write("カナ漢字")
+            assert driver.output == b"\x1cC\x01\x1c&\x83J\x83i\x8a\xbf\x8e\x9a"
+
+        def test_disabled(self, driver: printer.Dummy) -> None:
+            encode = MagicEncode(driver, encoding="CP437", multibyte_encoding="")
+            encode.write("中a")
+            assert driver.output == b"?a"
+
+        def test_invalid_encoding(self, driver: printer.Dummy) -> None:
+            with pytest.raises(ValueError):
+                MagicEncode(driver, multibyte_encoding="UTF-8")
+
+        def test_forced_encoding_leaves_kanji_mode(self) -> None:
+            instance = printer.Dummy()
+            instance.text("中文")
+            instance.charcode("CP437")
+            instance.text("é")
+            assert not instance.magic.kanji_mode
+            assert instance.output == b"\x1c&\xd6\xd0\xce\xc4\x1c.\x1bt\x00\x82"
+
+        def test_code_page_change_leaves_kanji_mode(
+            self, driver: printer.Dummy
+        ) -> None:
+            encode = MagicEncode(driver)
+            encode.write("中a")
+            assert driver.output == b"\x1c&\xd6\xd0\x1c.\x1bt\x00a"
+
+        def test_init_resets_kanji_mode(self) -> None:
+            instance = printer.Dummy(magic_encode_args={"encoding": "CP437"})
+            instance.text("中é")
+            instance.text("中")
+            assert instance.magic.kanji_mode
+            instance.hw("INIT")
+            assert not instance.magic.kanji_mode
+            assert instance.magic.encoding is None
+            assert not instance.magic.encoder.used_encodings
+            instance.clear()
+            instance.text("中")
+            assert instance.output == b"\x1c&\xd6\xd0"
+
+        def test_init_keeps_forced_encoding(self) -> None:
+            instance = printer.Dummy()
+            instance.charcode("CP858")
+            instance.hw("INIT")
+            assert instance.output == b"\x1bt\x13\x1b@\x1bt\x13"
+
     class TestForceEncoding:
         def test(self, driver: printer.Dummy) -> None:
             encode = MagicEncode(driver)
@@ -111,6 +347,65 @@ class TestMagicEncode:
             encode.write("€ ist teuro.")
             assert driver.output == b"\x1bt\x00? ist teuro."
 
+    class TestReset:
+        def test_known_encoding(self, driver: printer.Dummy) -> None:
+            encode = MagicEncode(driver)
+            encode.reset("CP437")
+            assert driver.output == b""
+            encode.write("café")
+            assert driver.output == b"caf\x82"
+
+        def test_unknown_encoding(self, driver: printer.Dummy) -> None:
+            encode = MagicEncode(driver, encoding="CP437")
+            encode.write("中é")
+            encode.reset()
+            assert not encode.kanji_mode
+            assert not encode.encoder.used_encodings
+            driver.clear()
+            encode.write("é")
+            assert driver.output == b"\x1bt\x00\x82"
+
+        def test_invalid_encoding(self, driver: printer.Dummy) -> None:
+            with pytest.raises(ValueError):
+                MagicEncode(driver).reset("UTF-8")
+
+
+class TestIncrementalEncoder:
+    """
+    Tests the incremental encoder.
+    """
+
+    def test_encode(self, driver: printer.Dummy) -> None:
+        encoder = IncrementalEncoder(
+            MagicEncode(driver, encoder=Encoder({"CP437": 0, "CP858": 1}))
+        )
+        # the last character of a chunk is held back
+        assert encoder.encode("ab") == b"\x1bt\x00a"
+        # the code page is kept across chunks
+        assert encoder.encode("cá") == b"bc"
+        assert encoder.encode("€") == b"\xa0"
+        assert encoder.encode("", final=True) == b"\x1bt\x01\xd5"
+        assert driver.output == b""
+
+    def test_combining_character(self, driver: printer.Dummy) -> None:
+        magic = MagicEncode(driver, encoder=Encoder({"CP437": 0, "KATAKANA": 1}))
+        encoder = IncrementalEncoder(magic)
+        assert encoder.encode("カ") == b""
+        assert encoder.encode("\uff9e", final=True) == b"\x1bt\x01\xb6\xde"
+
+    def test_combining_character_after_ascii(self, driver: printer.Dummy) -> None:
+        encoder = IncrementalEncoder(MagicEncode(driver, encoding="CP437"))
+        assert encoder.encode("a") == b""
+        assert encoder._pending == "a"
+        expected = MagicEncode(printer.Dummy(), encoding="CP437").encode("a\u0301")
+        assert encoder.encode("\u0301", final=True) == expected
+
+    def test_reset(self, driver: printer.Dummy) -> None:
+        encoder = IncrementalEncoder(MagicEncode(driver, encoding="CP437"))
+        encoder.encode("á")
+        encoder.reset()
+        assert encoder.encode("", final=True) == b""
+
 
 jaconv: typing.Optional[types.ModuleType]
 try:
@@ -131,3 +426,42 @@ class TestKatakana:
     def test_result(self) -> None:
         assert encode_katakana("カタカナ") == b"\xb6\xc0\xb6\xc5"
         assert encode_katakana("あいうえお") == b"\xb1\xb2\xb3\xb4\xb5"
+        # voiced kana are converted to two characters
+        assert encode_katakana("ガ") == b"\xb6\xde"
+
+    def test_magic_encode(self, driver: printer.Dummy) -> None:
+        encode = MagicEncode(driver, encoder=Encoder({"CP437": 0, "KATAKANA": 1}))
+        encode.write("カタカナ がぎ")
+        assert driver.output == b"\x1bt\x01\xb6\xc0\xb6\xc5 \xb6\xde\xb7\xde"
+
+    def test_magic_encode_without_katakana(self, driver: printer.Dummy) -> None:
+        encode = MagicEncode(driver, encoder=Encoder({"CP437": 0}), encoding="CP437")
+        encode.write("カa")
+        assert driver.output == b"?a"
+
+
+class TestPrinterConstruction:
+    """
+    Tests the cost of creating printer objects.
+    """
+
+    def test_context_is_built_once(self) -> None:
+        printer.Dummy().text("á€")
+        with mock.patch(
+            "escpos.magicencode.EncodingContext.from_codepage_map"
+        ) as from_codepage_map:
+            for _ in range(10):
+                printer.Dummy().text("á€")
+        from_codepage_map.assert_not_called()
+
+    def test_construction_builds_nothing(self) -> None:
+        printer.Dummy().text("á€")
+        with mock.patch(
+            "codecs.charmap_build", side_effect=codecs.charmap_build
+        ) as charmap_build, mock.patch(
+            "escpos.capabilities._parse_capabilities"
+        ) as parse_capabilities:
+            for _ in range(10):
+                printer.Dummy().text("á€")
+        charmap_build.assert_not_called()
+        parse_capabilities.assert_not_called()
@@ -1,6 +1,12 @@
 import pytest
 
-from escpos.capabilities import BARCODE_B, NotSupported, Profile, get_profile
+from escpos.capabilities import (
+    BARCODE_B,
+    DEFAULT_DPI,
+    NotSupported,
+    Profile,
+    get_profile,
+)
 
 
 @pytest.fixture
@@ -35,3 +41,46 @@ class TestCustomProfile:
 
     def test_features(self):
         assert Profile(features={"foo": True}).supports("foo")
+
+
+class TestProfileInfo:
+    """Test the precomputed data of profiles."""
+
+    def test_shared(self, profile):
+        assert get_profile("default").info is profile.info
+
+    def test_code_pages(self, profile):
+        code_pages = profile.get_code_pages()
+        assert code_pages["CP437"] == "0"
+        with pytest.raises(TypeError):
+            code_pages["CP437"] = "1"
+
+    def test_features(self):
+        profile = Profile(features={"foo": True, "bar": False, "barcodeB": True})
+        assert profile.supports("foo") is True
+        assert profile.supports("bar") is False
+        assert profile.info.barcode_hw_modes == ("barcodeB",)
+        assert profile.info.barcode_sw_modes == ()
+
+    def test_replaced_profile_data(self, profile):
+        profile.profile_data = {"media": {"width": {"pixels": 384, "mm": 58}}}
+        assert profile.info.media_width == 384
+        assert profile.info.dpi == int(384 / (48 / 25.4))
+        profile.profile_data = {"media": {"dpi": 203}}
+        assert profile.info.media_width is None
+        assert profile.info.dpi == 203
+
+    def test_refresh(self, profile):
+        profile.profile_data = {"media": {"width": {"pixels": 512}}}
+        other = get_profile("default")
+        other.profile_data = profile.profile_data
+        assert other.info is profile.info
+        profile.profile_data["media"]["width"]["pixels"] = 10
+        assert profile.info.media_width == 512
+        profile.refresh()
+        assert profile.info.media_width == 10
+        assert other.info.media_width == 10
+
+    def test_default_dpi(self, profile):
+        profile.profile_data = {}
+        assert profile.info.dpi == DEFAULT_DPI